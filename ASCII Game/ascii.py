@@ -1,11 +1,57 @@
+import argparse
+import atexit
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')) # Make the shared engine importable
+
+from engine.bitboard import BitBoard, GridAdapter
+from engine.book import OpeningBook
+from engine.mcts import MonteCarloSearcher, ParallelMonteCarloSearcher
+from engine.parallel import ParallelSearcher
+from engine.profiling import add_profile_arguments, profiler_from_args
+from engine.records import add_records_arguments, writer_from_args
+from engine.rules import Rules, add_rules_arguments, rules_from_args
+from engine.search import MAX_DEPTH, Searcher
+from engine.tt import TranspositionTable
+from engine.worker import SearchWorker
+
 # Game constants
-GRID_SIZE = 11 # Number of rows and columns
 EMPTY_CELL = '-' # Empty cell
 PLAYER_CELL = 'X' # Player's cell
 AI_CELL = 'O' # AI's cell
-
-# Create the grid
-grid = [[EMPTY_CELL] * GRID_SIZE for _ in range(GRID_SIZE)]
+AI_TIME_LIMIT_MS = 1000 # How long the AI may think about one move (milliseconds)
+AI_DEPTH = MAX_DEPTH # Deepest search the AI tries within its time limit
+AI_TABLE_MB = 64 # Memory cap for the AI's transposition table (megabytes)
+AI_WORKERS = 1 # Processes the AI splits its search over (0 for one per CPU)
+AI_ENGINE = 'alphabeta' # Which AI plays: 'alphabeta' search or 'mcts' playouts
+
+# Command line settings
+parser = argparse.ArgumentParser(description="Four in a row against the AI")
+parser.add_argument('--ai-ms', type=int, default=AI_TIME_LIMIT_MS, help="time the AI may think about each move, in milliseconds (0 for no limit)")
+parser.add_argument('--ai-depth', type=int, default=AI_DEPTH, help="deepest search the AI tries, in plies")
+parser.add_argument('--ai-workers', type=int, default=AI_WORKERS, help="processes the AI splits its search over, 0 for one per CPU")
+parser.add_argument('--ai-engine', choices=('alphabeta', 'mcts'), default=AI_ENGINE, help="alpha-beta search or Monte Carlo tree search")
+add_rules_arguments(parser)
+add_records_arguments(parser)
+parser.add_argument('--ponder', action='store_true', help="let the AI think while the player types, using one process")
+add_profile_arguments(parser)
+
+transposition_table = TranspositionTable(AI_TABLE_MB) # Remembers searched positions between moves
+opening_book = OpeningBook() # Memory-mapped book of opening moves, answers the first few moves without searching
+game_log = None # Saves each game before its board is cleared, set up from --records
+profiler = None # Times the AI and the board checks, set up from --profile
+ai_worker = None # Background search used with --ponder, so the AI can think during input()
+
+def create_game(rules): # Create the grid (a bitboard per side behind the usual grid[row][col] interface) and the AI for it
+    global GRID_SIZE, board, grid, AI_SIDE, searcher
+    GRID_SIZE = rules.size # Number of rows and columns
+    board = BitBoard(rules.size, rules.win_length)
+    grid = GridAdapter(board, (PLAYER_CELL, AI_CELL), EMPTY_CELL)
+    AI_SIDE = grid.sides[AI_CELL]
+    searcher = Searcher(board, AI_DEPTH, AI_TIME_LIMIT_MS, transposition_table, book=opening_book) # Searches deeper until the time runs out
+
+create_game(Rules())
 
 def draw_grid(): # Draw the grid
     for row in range(GRID_SIZE): 
@@ -16,127 +62,26 @@ def draw_grid(): # Draw the grid
 def is_valid_move(row, col): # Check if the move is valid
     return 0 <= row < GRID_SIZE and 0 <= col < GRID_SIZE and grid[row][col] == EMPTY_CELL
 
-def check_winner(): # Check if there is a winner
-    for row in range(GRID_SIZE):
-        for col in range(GRID_SIZE):
-            if grid[row][col] != EMPTY_CELL:
-                # Check horizontal line
-                if col + 3 < GRID_SIZE and all(grid[row][c] == grid[row][col] for c in range(col, col + 4)):
-                    return grid[row][col]
-
-                # Check vertical line
-                if row + 3 < GRID_SIZE and all(grid[r][col] == grid[row][col] for r in range(row, row + 4)):
-                    return grid[row][col]
-
-                # Check diagonal lines
-                if row + 3 < GRID_SIZE and col + 3 < GRID_SIZE:
-                    if all(grid[row + i][col + i] == grid[row][col] for i in range(4)):
-                        return grid[row][col]
-                    if all(grid[row + i][col - i] == grid[row][col] for i in range(4)):
-                        return grid[row][col]
-
-    return None
-
-def alpha_beta_pruning(row, col, depth, maximizing_player, alpha, beta):
-    if depth == 0 or row >= GRID_SIZE or col >= GRID_SIZE:
-        return evaluate_move(row, col, AI_CELL) - evaluate_move(row, col, PLAYER_CELL)
-
-    if maximizing_player:
-        max_eval = float("-inf")
-        for r in range(row, row + 4):
-            for c in range(col, col + 4):
-                if is_valid_move(r, c):
-                    grid[r][c] = AI_CELL
-                    eval = alpha_beta_pruning(r, c, depth - 1, False, alpha, beta)
-                    grid[r][c] = EMPTY_CELL
-                    max_eval = max(max_eval, eval)
-                    alpha = max(alpha, eval)
-                    if beta <= alpha:
-                        break
-        return max_eval
-    else:
-        min_eval = float("inf")
-        for r in range(row, row + 4):
-            for c in range(col, col + 4):
-                if is_valid_move(r, c):
-                    grid[r][c] = PLAYER_CELL
-                    eval = alpha_beta_pruning(r, c, depth - 1, True, alpha, beta)
-                    grid[r][c] = EMPTY_CELL
-                    min_eval = min(min_eval, eval)
-                    beta = min(beta, eval)
-                    if beta <= alpha:
-                        break
-        return min_eval
+def check_winner(row=None, col=None): # Check if there is a winner
+    if row is None or col is None:
+        return grid.winner()
+    return grid.winner_at(row, col) # Only the side that just moved can have a new line
 
 def ai_make_move():
-    # AI's move (intelligent placement)
-    best_move = None
-    best_score = float("-inf")
-    depth = 4  # Adjust the depth of the search based on performance and desired difficulty
-
-    for row in range(GRID_SIZE):
-        for col in range(GRID_SIZE):
-            if is_valid_move(row, col):
-                grid[row][col] = AI_CELL
-                score = alpha_beta_pruning(row, col, depth - 1, False, float("-inf"), float("inf"))
-                grid[row][col] = EMPTY_CELL
-
-                if score > best_score:
-                    best_move = (row, col)
-                    best_score = score
-
-    if best_move is not None:
-        row, col = best_move
-        grid[row][col] = AI_CELL
-
-def evaluate_move(row, col, player, blocking=False):
-    score = 0
-
-    # Check horizontal line
-    for c in range(col, col + 4):
-        if c < GRID_SIZE:
-            if grid[row][c] == player:
-                score += 1
-            elif grid[row][c] != EMPTY_CELL:
-                score -= 1
-            elif blocking and grid[row][c] != PLAYER_CELL:
-                score += 0.5
-
-    # Check vertical line
-    for r in range(row, row + 4):
-        if r < GRID_SIZE:
-            if grid[r][col] == player:
-                score += 1
-            elif grid[r][col] != EMPTY_CELL:
-                score -= 1
-            elif blocking and grid[r][col] != PLAYER_CELL:
-                score += 0.5
-
-    # Check diagonal line (top-left to bottom-right)
-    for i in range(4):
-        r = row + i
-        c = col + i
-        if r < GRID_SIZE and c < GRID_SIZE:
-            if grid[r][c] == player:
-                score += 1
-            elif grid[r][c] != EMPTY_CELL:
-                score -= 1
-            elif blocking and grid[r][c] != PLAYER_CELL:
-                score += 0.5
-
-    # Check diagonal line (top-right to bottom-left)
-    for i in range(4):
-        r = row + i
-        c = col - i
-        if r < GRID_SIZE and c >= 0:
-            if grid[r][c] == player:
-                score += 1
-            elif grid[r][c] != EMPTY_CELL:
-                score -= 1
-            elif blocking and grid[r][c] != PLAYER_CELL:
-                score += 0.5
-
-    return score
+    # AI's move (alpha-beta search over the candidate moves)
+    if ai_worker is not None:
+        ai_worker.start(board, AI_SIDE) # Carries on from the ponder search if it guessed the player's move
+        move, score = ai_worker.result()
+    else:
+        move, score = searcher.search(AI_SIDE)
+    if move is None:
+        return None
+
+    row, col = board.cell(move)
+    grid[row][col] = AI_CELL
+    if ai_worker is not None:
+        ai_worker.ponder(board, AI_SIDE) # Think about the next move while the player types
+    return row, col
 
 def display_winner(winner): # Display the winner
     if winner == PLAYER_CELL:
@@ -146,58 +91,118 @@ def display_winner(winner): # Display the winner
     else:
         print("It's a tie!")
 
-def reset_game():
-    for row in range(GRID_SIZE):
-        for col in range(GRID_SIZE):
-            grid[row][col] = EMPTY_CELL
+def save_game(): # Append the game to the records folder before its board is cleared
+    if game_log is not None and board.history:
+        game_log.append(board)
 
-# Game loop
-restart_game = False
-current_player = PLAYER_CELL
+def report_profile(): # Print where the time went and write the cProfile file, when profiling is on
+    if profiler is not None:
+        print(profiler.report())
+        print(f"Profile written to {profiler.dump()}")
 
-while True: 
-    if restart_game:
-        reset_game()
-        restart_game = False
-        current_player = PLAYER_CELL
+def end_session(): # Runs when the program closes
+    save_game()
+    report_profile()
+    if ai_worker is not None:
+        stats = ai_worker.ponder_stats()
+        print(f"Ponder hits: {stats['ponder_hits']} of {stats['ponders']} ({stats['ponder_hit_rate']:.0%}), mean AI response {stats['mean_response_ms']:.0f} ms")
 
-    game_over = False
-    winner = None
+def reset_game():
+    if ai_worker is not None:
+        ai_worker.cancel() # Stop pondering on the old game before clearing its table
+    save_game()
+    report_profile()
+    grid.reset()
+    transposition_table.clear()
+
+def main():
+    global searcher, game_log, profiler, ai_worker
+    args = parser.parse_args()
+    create_game(rules_from_args(parser, args))
+    game_log = writer_from_args(args)
+    profiler = profiler_from_args(args) # None unless --profile or FOUR_PROFILE turned it on
+    if profiler is not None:
+        profiler.instrument(sys.modules[__name__], ('ai_make_move', 'check_winner', 'draw_grid'))
+        profiler.instrument_engine()
+        profiler.watch_cache('transposition table', transposition_table)
+        profiler.watch_cache('opening book', opening_book)
+    atexit.register(end_session) # Keep the game being played when the program is closed
+    if args.ai_engine == 'mcts':
+        if args.ai_workers == 1:
+            searcher = MonteCarloSearcher(board, args.ai_ms or None) # Random playouts, keeps its tree between moves
+        else:
+            searcher = ParallelMonteCarloSearcher(board, args.ai_ms or None, args.ai_workers or None) # One tree per process, visits added up
+    else:
+        if args.ai_workers != 1:
+            searcher = ParallelSearcher(board, workers=args.ai_workers or None, table_mb=AI_TABLE_MB, book=opening_book) # Root moves spread over a process pool
+        searcher.depth = args.ai_depth
+        searcher.time_limit_ms = args.ai_ms or None
+    if args.ponder:
+        ai_worker = SearchWorker(args.ai_depth, args.ai_ms or None, transposition_table, opening_book, args.ai_engine, ponder=True)
+
+    try:
+        play()
+    finally:
+        if ai_worker is not None:
+            ai_worker.shutdown() # Stop pondering, or the program would wait for the search to finish before closing
+        searcher.stop() # Ctrl+C while the AI thinks: end the search running in the pool instead of waiting it out
+        if hasattr(searcher, 'shutdown'):
+            searcher.shutdown() # Only the searchers with a process pool have one
+
+def play():
+    # Game loop
+    restart_game = False
+    current_player = PLAYER_CELL
+
+    while True: 
+        if restart_game:
+            reset_game()
+            restart_game = False
+            current_player = PLAYER_CELL
+
+        game_over = False
+        winner = None
+
+        while not game_over: 
+            draw_grid()
+
+            if current_player == AI_CELL: 
+                move = ai_make_move()
+                if move is not None:
+                    winner = check_winner(*move)
+                    if winner is not None:
+                        game_over = True
+                current_player = PLAYER_CELL
+            else:
+                while True:
+                    try:
+                        print("Player's move (row col):")
+                        row, col = map(int, input().split())
+                        if is_valid_move(row, col):
+                            grid[row][col] = PLAYER_CELL
+                            winner = check_winner(row, col)
+                            if winner is not None:
+                                game_over = True
+                                if ai_worker is not None:
+                                    ai_worker.cancel() # Stop pondering while the game over prompt waits
+                            current_player = AI_CELL
+                            break
+                        else:
+                            print("Invalid move. Try again.")
+                    except ValueError:
+                        print("Invalid input. Try again.")
 
-    while not game_over: 
         draw_grid()
 
-        if current_player == AI_CELL: 
-            ai_make_move()
-            winner = check_winner()
-            if winner is not None:
-                game_over = True
-            current_player = PLAYER_CELL
-        else:
-            while True:
-                try:
-                    print("Player's move (row col):")
-                    row, col = map(int, input().split())
-                    if is_valid_move(row, col):
-                        grid[row][col] = PLAYER_CELL
-                        winner = check_winner()
-                        if winner is not None:
-                            game_over = True
-                        current_player = AI_CELL
-                        break
-                    else:
-                        print("Invalid move. Try again.")
-                except ValueError:
-                    print("Invalid input. Try again.")
-
-    draw_grid()
-
-    # Game over loop
-    while True:
-        print("Game over.")
-        display_winner(winner)
-        print("Press 'R' to play again")
-        choice = input()
-        if choice.lower() == 'r':
-            restart_game = True
-            break
+        # Game over loop
+        while True:
+            print("Game over.")
+            display_winner(winner)
+            print("Press 'R' to play again")
+            choice = input()
+            if choice.lower() == 'r':
+                restart_game = True
+                break
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+import os
+import threading
+import zlib
+
+import pygame
+
+# Startup helpers for the pygame clients: only the pygame modules the game uses are
+# started, the scaled background is cached on disk, and the sounds are decoded on a
+# background thread so the first frame does not wait for them.
+
+GAME_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # The "Main Game" folder
+CACHE_DIR = os.path.join(GAME_DIR, '.cache')  # Scaled backgrounds, safe to delete
+BACKDROP = (255, 255, 255)  # Colour behind see-through images (white, like the board)
+
+
+def asset_path(*parts): # Path to a file under "Main Game" that works on any OS and from any working directory
+    return os.path.join(GAME_DIR, *parts)
+
+
+def init_pygame(): # Start the display and fonts only, the mixer is started by SoundLoader
+    pygame.display.init()
+    pygame.font.init()
+
+
+def flatten(surface, alpha, backdrop=BACKDROP): # An opaque copy of the surface as it looks drawn at `alpha` over a plain colour
+    flat = pygame.Surface(surface.get_size())
+    flat.fill(backdrop)
+    faded = surface.copy()
+    faded.set_alpha(alpha)
+    flat.blit(faded, (0, 0))  # The only alpha blend, done once here instead of on every blit
+    return flat.convert()
+
+
+def load_background(path, size, alpha=None): # The image scaled to `size` in the display's pixel format, cached on disk
+    modified = os.stat(path).st_mtime_ns
+    faded = '' if alpha is None else f"-a{alpha}"
+    name = f"background-{zlib.crc32(path.encode()):08x}-{modified}-{size[0]}x{size[1]}{faded}.bmp"  # Changes when the image, size or alpha does
+    cached = os.path.join(CACHE_DIR, name)
+    try:
+        return pygame.image.load(cached).convert()  # Uncompressed, so no PNG decode or rescale
+    except (OSError, pygame.error):
+        pass
+    image = pygame.transform.scale(pygame.image.load(path), size).convert()
+    if alpha is not None:
+        image = flatten(image, alpha)  # Blended over white once, so it blits as a plain copy
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        pygame.image.save(image, cached)
+    except (OSError, pygame.error):
+        pass  # Read-only folder: scale it again next time
+    return image
+
+
+class SoundLoader:
+    # Starts the mixer and decodes the sounds on a background thread; play() is silent until a sound is ready
+    def __init__(self, files):
+        self.sounds = {}
+        self.thread = threading.Thread(target=self.load, args=(dict(files),), name='sound-loader', daemon=True)
+        self.thread.start()
+
+    def load(self, files):
+        try:
+            pygame.mixer.init()
+        except pygame.error:
+            return  # No audio device, the game plays without sound
+        for name, path in files.items():
+            self.sounds[name] = pygame.mixer.Sound(path)
+
+    def play(self, name):
+        sound = self.sounds.get(name)
+        if sound is not None:
+            sound.play()
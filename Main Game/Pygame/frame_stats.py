@@ -0,0 +1,33 @@
+# Histogram of how long each frame took to process, not counting the time clock.tick() slept
+
+BUCKETS_MS = (1, 2, 4, 8, 12, 16, 33, 50)  # Upper edge of each bucket (milliseconds)
+
+
+class FrameStats:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)  # Last bucket holds everything slower than the final edge
+        self.frames = 0
+        self.worst_ms = 0
+
+    def record(self, frame_ms):
+        self.frames += 1
+        self.worst_ms = max(self.worst_ms, frame_ms)
+        for bucket, edge in enumerate(BUCKETS_MS):
+            if frame_ms < edge:
+                self.counts[bucket] += 1
+                return
+        self.counts[-1] += 1
+
+    def over(self, limit_ms): # Number of frames that took limit_ms or longer
+        return sum(count for edge, count in zip((0,) + BUCKETS_MS, self.counts) if edge >= limit_ms)
+
+    def report(self):
+        lines = [f"Frame times over {self.frames} frames (worst {self.worst_ms} ms):"]
+        lower = 0
+        for edge, count in zip(BUCKETS_MS + (None,), self.counts):
+            label = f"{lower:>3}-{edge:<3} ms" if edge is not None else f"{lower:>3}+    ms"
+            share = count / self.frames if self.frames else 0
+            lines.append(f"  {label} {count:>7} {share:>7.1%} {'#' * round(share * 40)}")
+            lower = edge
+        lines.append(f"  {self.over(16)} frames took 16 ms or longer")
+        return '\n'.join(lines)
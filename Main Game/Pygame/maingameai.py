@@ -1,301 +1,265 @@
+import time
+
+LAUNCHED = time.perf_counter() # When the script started, for --startup-time
+
+import argparse
+import os
 import pygame
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')) # Make the shared engine importable
+
+from engine.bitboard import BitBoard, GridAdapter
+from engine.book import OpeningBook
+from engine.profiling import add_profile_arguments, profiler_from_args
+from engine.records import add_records_arguments, writer_from_args
+from engine.rules import add_rules_arguments, rules_from_args
+from engine.search import MAX_DEPTH
+from engine.tt import TranspositionTable
+from engine.worker import SearchWorker
+from assets import SoundLoader, asset_path, init_pygame, load_background
+from frame_stats import FrameStats
+from renderer import BoardRenderer
+
 # Game constants
-GRID_SIZE = 11 # Size of the grid (11x11)
-CELL_SIZE = 50 # Size of each cell (50x50 pixels)
+MAX_CELL_SIZE = 50 # Size of each cell on the normal board (50x50 pixels)
+MAX_BOARD_PIXELS = 800 # Widest the board may get, cells shrink to fit on big boards (pixels)
 PADDING_TOP = 50 # Padding on top of the grid (50 pixels)
-WINDOW_SIZE = (GRID_SIZE * CELL_SIZE, (GRID_SIZE * CELL_SIZE) + PADDING_TOP)
 PLAYER_COLOUR = (66, 73, 255)  # Blue Player colour
 AI_COLOUR = (255, 66, 66)  # Red AI colour
 FONT_SIZE = 20 # Font size (20 pixels)
 FONT_COLOUR = (0, 0, 0)  # Black font colour
 FONT_COLOUR_2 = (255, 255, 255)  # White font colour
-CUSTOM_FONT_FILE = 'Main Game\Fonts\Minecraftia.ttf' # Custom font file
-PLAYER_SOUND_FILE = 'Main Game\Sound Effects\ding-idea-40142_ljQkHJgG.wav'  # Custom player move sound file
-AI_SOUND_FILE = 'Main Game\Sound Effects\mixkit-arcade-robot-sound-1415_OiPFfAGb.wav'  # Custom AI sound file
-WINNER_SOUND_FILE = 'Main Game\Sound Effects\mixkit-winning-chimes-2015.wav'  # Custom winner sound file
-WIN_SCORE = 1000
-LOSS_SCORE = -1000
-INFINITY = float('inf')
-
-# Initialize Pygame
-pygame.init()
-window = pygame.display.set_mode(WINDOW_SIZE) # Create the window
-clock = pygame.time.Clock() # Create the clock
-custom_font = pygame.font.Font(CUSTOM_FONT_FILE, FONT_SIZE) # Create the font
-
-# Create the grid
-grid = [[None] * GRID_SIZE for _ in range(GRID_SIZE)]
-
-# Load and resize the custom image
-background_image = pygame.image.load('Main Game\Backgrounds\DALL·E 2023-07-15 21.20.00 - digital art depicting a hexagon background with various shades of green.png') # Custom background image
-background_image = pygame.transform.scale(background_image, WINDOW_SIZE) # Resize the image to fit the window
-
-# Create a copy of the image to modify its transparency
-background_copy = background_image.copy()
-
-# Set the transparency level (0-255) on the copied image surface
-alpha_value = 200  # Change this value to adjust transparency
-background_copy.set_alpha(alpha_value) # Set the transparency level
-
-# Load the sounds
-player_sound = pygame.mixer.Sound(PLAYER_SOUND_FILE) # Custom player move sound
-ai_sound = pygame.mixer.Sound(AI_SOUND_FILE) # Custom AI sound
-winner_sound = pygame.mixer.Sound(WINNER_SOUND_FILE) # Custom winner sound
-
-# Flag to track if the winner sound has been played
-winner_sound_played = False
-
-ai_last_move_time = 0  # Time when the AI last moved
+CUSTOM_FONT_FILE = asset_path('Fonts', 'Minecraftia.ttf') # Custom font file
+PLAYER_SOUND_FILE = asset_path('Sound Effects', 'ding-idea-40142_ljQkHJgG.wav')  # Custom player move sound file
+AI_SOUND_FILE = asset_path('Sound Effects', 'mixkit-arcade-robot-sound-1415_OiPFfAGb.wav')  # Custom AI sound file
+WINNER_SOUND_FILE = asset_path('Sound Effects', 'mixkit-winning-chimes-2015.wav')  # Custom winner sound file
+BACKGROUND_FILE = asset_path('Backgrounds', 'DALL·E 2023-07-15 21.20.00 - digital art depicting a hexagon background with various shades of green.png')  # Custom background image
+GAME_OVER_FPS = 15 # Frame rate while the game over screen waits for a key
+AI_TIME_LIMIT_MS = 1000 # How long the AI may think about one move (milliseconds)
+AI_DEPTH = MAX_DEPTH # Deepest search the AI tries within its time limit
+AI_TABLE_MB = 64 # Memory cap for the AI's transposition table (megabytes)
 
 def draw_grid():
-    window.fill((255, 255, 255))  # Fill the window with white
-    window.blit(background_copy, (0, 0))  # Draw the background image
-
-    for row in range(GRID_SIZE):
-        for col in range(GRID_SIZE):
-            rect = pygame.Rect(col * CELL_SIZE, (row * CELL_SIZE) + PADDING_TOP, CELL_SIZE, CELL_SIZE) # Creates the grid's rectangles
-            pygame.draw.rect(window, (0, 0, 0), rect, 1)  # Draw grid lines
-
-            if grid[row][col] == 'player':
-                pygame.draw.rect(window, PLAYER_COLOUR, rect)  # Draw player's square
-            elif grid[row][col] == 'ai':
-                pygame.draw.rect(window, AI_COLOUR, rect)  # Draw AI's square
-
-    pygame.display.update()
+    header = "AI is thinking..." if ai_worker.busy() else None  # Show that the AI is working on its move
+    renderer.draw(grid, header)  # Only repaints what changed since the last frame
 
 def is_valid_move(row, col):
     return 0 <= row < GRID_SIZE and 0 <= col < GRID_SIZE and grid[row][col] is None # Check if the move is valid
 
-def check_winner(): 
-    for row in range(GRID_SIZE):
-        for col in range(GRID_SIZE):
-            if grid[row][col] is not None:
-                # Check horizontal line
-                if col + 3 < GRID_SIZE and all(grid[row][c] == grid[row][col] for c in range(col, col + 4)): 
-                    return grid[row][col] 
-
-                # Check vertical line
-                if row + 3 < GRID_SIZE and all(grid[r][col] == grid[row][col] for r in range(row, row + 4)):
-                    return grid[row][col]
-
-                # Check diagonal lines
-                if row + 3 < GRID_SIZE and col + 3 < GRID_SIZE:
-                    if all(grid[row + i][col + i] == grid[row][col] for i in range(4)):
-                        return grid[row][col]
-                    if all(grid[row + i][col - i] == grid[row][col] for i in range(4)):
-                        return grid[row][col]
-                    
-    return None
+def check_winner(row=None, col=None):
+    if row is None or col is None:
+        return grid.winner()
+    return grid.winner_at(row, col) # Only the side that just moved can have a new line
 
 def ai_make_move():
-    # AI's move (intelligent placement)
-
-    # Check if AI can win
-    for row in range(GRID_SIZE):
-        for col in range(GRID_SIZE):
-            if is_valid_move(row, col):
-                grid[row][col] = 'ai'
-                if check_winner() == 'ai':
-                    grid[row][col] = 'ai'
-                    ai_sound.play()  # Play the AI move sound
-                    return
-                grid[row][col] = None
-
-    # Check if AI can block player's line of 4
-    for row in range(GRID_SIZE):
-        for col in range(GRID_SIZE):
-            if is_valid_move(row, col):
-                grid[row][col] = 'player'
-                if check_winner() == 'player':
-                    grid[row][col] = 'ai'
-                    ai_sound.play()  # Play the AI move sound
-                    return
-                grid[row][col] = None
-
-    # Otherwise, evaluate the best move as before
-    best_move = None
-    best_score = float('-inf')
-
-    for row in range(GRID_SIZE):
-        for col in range(GRID_SIZE):
-            if is_valid_move(row, col):
-                score = evaluate_move(row, col, 'ai', 'player', blocking=True)
-                if score > best_score:
-                    best_move = (row, col)
-                    best_score = score
-
-    if best_move is not None:
-        row, col = best_move
-        grid[row][col] = 'ai'
-        ai_sound.play()  # Play the AI move sound
-
-def evaluate_move(row, col, player, opponent, blocking=False):
-    score = 0
-
-    # Check horizontal line
-    for c in range(col - 3, col + 1):
-        if c >= 0 and c + 4 < GRID_SIZE:
-            tiles = [grid[row][c+i] for i in range(5)]
-            if tiles.count(opponent) == 4:
-                if blocking:
-                    # Block the player's line of 4 by placing a tile in the direction of the line of 3
-                    if c - 1 >= 0 and grid[row][c - 1] is None:
-                        score += 10
-                    elif c + 5 < GRID_SIZE and grid[row][c + 5] is None:
-                        score += 10
-
-    # Check vertical line
-    for r in range(row - 3, row + 1):
-        if r >= 0 and r + 4 < GRID_SIZE:
-            tiles = [grid[r+i][col] for i in range(5)]
-            if tiles.count(opponent) == 4:
-                if blocking:
-                    # Block the player's line of 4 by placing a tile in the direction of the line of 3
-                    if r - 1 >= 0 and grid[r - 1][col] is None:
-                        score += 10
-                    elif r + 5 < GRID_SIZE and grid[r + 5][col] is None:
-                        score += 10
-
-    # Check diagonal line (top-left to bottom-right)
-    for i in range(5):
-        r = row - i
-        c = col - i
-        if r >= 0 and c >= 0 and r + 4 < GRID_SIZE and c + 4 < GRID_SIZE:
-            tiles = [grid[r+i][c+i] for i in range(5)]
-            if tiles.count(opponent) == 4:
-                if blocking:
-                    # Block the player's line of 4 by placing a tile in the direction of the line of 3
-                    if r - 1 >= 0 and c - 1 >= 0 and grid[r - 1][c - 1] is None:
-                        score += 10
-                    elif r + 5 < GRID_SIZE and c + 5 < GRID_SIZE and grid[r + 5][c + 5] is None:
-                        score += 10
-
-    # Check diagonal line (top-right to bottom-left)
-    for i in range(5):
-        r = row - i
-        c = col + i
-        if r >= 0 and c < GRID_SIZE and r + 4 < GRID_SIZE and c - 4 >= 0:
-            tiles = [grid[r+i][c-i] for i in range(5)]
-            if tiles.count(opponent) == 4:
-                if blocking:
-                    # Block the player's line of 4 by placing a tile in the direction of the line of 3
-                    if r - 1 >= 0 and c + 1 < GRID_SIZE and grid[r - 1][c + 1] is None:
-                        score += 10
-                    elif r + 5 < GRID_SIZE and c - 5 >= 0 and grid[r + 5][c - 5] is None:
-                        score += 10
-
-    return score
-
-def minimax(depth, maximizing_player):
-    if depth == 0 or check_winner():
-        return 0
-
-    if maximizing_player:
-        max_eval = float('-inf')
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
-                if is_valid_move(row, col):
-                    grid[row][col] = 'ai'
-                    eval = minimax(depth - 1, False)
-                    grid[row][col] = None
-                    max_eval = max(max_eval, eval)
-        return max_eval
-    else:
-        min_eval = float('inf')
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
-                if is_valid_move(row, col):
-                    grid[row][col] = 'player'
-                    eval = minimax(depth - 1, True)
-                    grid[row][col] = None
-                    min_eval = min(min_eval, eval)
-        return min_eval
+    # AI's move (alpha-beta search over the bitboard, run on the worker thread)
+    if not ai_worker.started():
+        ai_worker.start(board, AI_SIDE)
+
+def ai_finished_move():
+    # The AI's move once its search has finished, False while it is still thinking and None if no cell is left
+    result = ai_worker.poll()
+    if result is None:
+        return False
+    move, score = result
+    if move is None:
+        return None
+
+    row, col = board.cell(move)
+    grid[row][col] = 'ai'
+    sounds.play('ai')  # Play the AI move sound
+    ai_worker.ponder(board, AI_SIDE)  # With --ponder, keep thinking while the player chooses
+    return row, col
 
 def display_winner(winner):
     global winner_sound_played
 
     if winner == 'player':
-        text = custom_font.render("Player wins!", True, FONT_COLOUR)
+        text = "Player wins!"
     elif winner == 'ai':
-        text = custom_font.render("AI wins!", True, FONT_COLOUR)
+        text = "AI wins!"
     else:
-        text = custom_font.render("It's a tie!", True, FONT_COLOUR)
+        text = "It's a tie!"
 
-    text_rect = text.get_rect(center=(WINDOW_SIZE[0] // 2, PADDING_TOP // 2))
-    window.blit(text, text_rect)
+    renderer.draw(grid, text, "Press 'R' to play again")  # Only drawn when the message changes
     if not winner_sound_played:  # Check if the winner sound has not been played
-        winner_sound.play()  # Play the winner sound
+        sounds.play('winner')  # Play the winner sound
         winner_sound_played = True  # Set the flag to True
 
-def reset_game():
-    for row in range(GRID_SIZE):
-        for col in range(GRID_SIZE):
-            grid[row][col] = None
-
-# Game loop
-restart_game = False
-current_player = 'player'
-
-while True:
-    if restart_game:
-        reset_game()
-        restart_game = False
-        current_player = 'player'
-        winner_sound_played = False  # Reset the winner sound played flag
-    game_over = False
-    winner = None
-
-    while not game_over:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+def save_game(): # Append the game to the records folder before its board is cleared
+    if game_log is not None and board.history:
+        game_log.append(board)
 
-            if current_player == 'ai' and not game_over:
-                ai_make_move()
-                winner = check_winner()
-                if winner is not None:
-                    game_over = True
+def report_profile(): # Print where the time went and write the cProfile file, when profiling is on
+    if profiler is not None:
+        print(profiler.report(frame_stats.report()))
+        print(f"Profile written to {profiler.dump()}")
 
-                current_player = 'player'
+def reset_game():
+    ai_worker.cancel()  # Stop thinking about the old game before clearing its table
+    save_game()
+    report_profile()
+    grid.reset()
+    transposition_table.clear()
+
+def quit_game():
+    ai_worker.shutdown()
+    save_game()
+    report_profile()
+    if args.frame_stats:
+        print(frame_stats.report())
+    if args.ponder:
+        stats = ai_worker.ponder_stats()
+        print(f"Ponder hits: {stats['ponder_hits']} of {stats['ponders']} ({stats['ponder_hit_rate']:.0%}), mean AI response {stats['mean_response_ms']:.0f} ms")
+    sys.setswitchinterval(default_switch_interval) # The launcher's interpreter gets its usual setting back
+    pygame.quit()
+    sys.exit()
+
+def main(argv=None, launched=None):
+    # Runs the game; the launcher calls this in its own process, passing the time the menu closed
+    global args, GRID_SIZE, CELL_SIZE, WINDOW_SIZE, window, clock, custom_font, board, grid, AI_SIDE
+    global transposition_table, opening_book, ai_worker, frame_stats, renderer, sounds, winner_sound_played, game_log, profiler
+    global default_switch_interval
+
+    # Command line settings
+    parser = argparse.ArgumentParser(description="Four in a row against the AI")
+    parser.add_argument('--ai-ms', type=int, default=AI_TIME_LIMIT_MS, help="time the AI may think about each move, in milliseconds (0 for no limit)")
+    parser.add_argument('--ai-depth', type=int, default=AI_DEPTH, help="deepest search the AI tries, in plies")
+    parser.add_argument('--ai-engine', choices=('alphabeta', 'mcts'), default='alphabeta', help="alpha-beta search or Monte Carlo tree search")
+    parser.add_argument('--frame-stats', action='store_true', help="print a histogram of frame times when the game closes")
+    parser.add_argument('--ponder', action='store_true', help="let the AI think during the player's turn")
+    parser.add_argument('--startup-time', action='store_true', help="print how long it took from launch to the first frame")
+    add_rules_arguments(parser)
+    add_records_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    rules = rules_from_args(parser, args) # Board size and win length
+    GRID_SIZE = rules.size # Size of the grid (11x11 unless --size says otherwise)
+    CELL_SIZE = min(MAX_CELL_SIZE, MAX_BOARD_PIXELS // GRID_SIZE) # Size of each cell
+    WINDOW_SIZE = (GRID_SIZE * CELL_SIZE, (GRID_SIZE * CELL_SIZE) + PADDING_TOP)
+
+    # Initialize Pygame
+    init_pygame() # Only the display and fonts, the sounds load in the background
+    sounds = SoundLoader({'player': PLAYER_SOUND_FILE, 'ai': AI_SOUND_FILE, 'winner': WINNER_SOUND_FILE}) # Plays nothing until each sound is decoded
+    window = pygame.display.set_mode(WINDOW_SIZE) # Create the window
+    clock = pygame.time.Clock() # Create the clock
+    custom_font = pygame.font.Font(CUSTOM_FONT_FILE, FONT_SIZE) # Create the font
+
+    # Create the grid (a bitboard per side behind the usual grid[row][col] interface)
+    board = BitBoard(rules.size, rules.win_length)
+    game_log = writer_from_args(args) # Saves each game before its board is cleared
+    grid = GridAdapter(board, ('player', 'ai'))
+    AI_SIDE = grid.sides['ai']
+    transposition_table = TranspositionTable(AI_TABLE_MB) # Remembers searched positions between moves
+    opening_book = OpeningBook() # Memory-mapped book of opening moves, answers the first few moves without searching
+    ai_worker = SearchWorker(args.ai_depth, args.ai_ms or None, transposition_table, opening_book, args.ai_engine, args.ponder) # Searches on its own thread so the window keeps drawing
+    frame_stats = FrameStats() # Time spent on each frame
+    default_switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(0.001) # Hand the interpreter back to the render loop quickly while the AI thread is searching
+    profiler = profiler_from_args(args) # None unless --profile or FOUR_PROFILE turned it on
+    if profiler is not None:
+        profiler.instrument(sys.modules[__name__], ('ai_make_move', 'ai_finished_move', 'check_winner', 'draw_grid'))
+        profiler.instrument_engine()
+        profiler.watch_cache('transposition table', transposition_table)
+        profiler.watch_cache('opening book', opening_book)
+
+    # Load the background resized to fit the window and faded over white (cached on disk after the first run)
+    alpha_value = 200  # Change this value to adjust transparency
+    background_copy = load_background(BACKGROUND_FILE, WINDOW_SIZE, alpha_value) # Opaque, so drawing it is a plain copy
+
+    # Draws the board, repainting only the cells that change
+    renderer = BoardRenderer(window, background_copy, GRID_SIZE, CELL_SIZE, PADDING_TOP, {'player': PLAYER_COLOUR, 'ai': AI_COLOUR}, custom_font, FONT_COLOUR, FONT_COLOUR_2)
+
+    # Flag to track if the winner sound has been played
+    winner_sound_played = False
+
+    # Game loop
+    restart_game = False
+    current_player = 'player'
+    first_frame = True
 
-            if event.type == pygame.MOUSEBUTTONDOWN and current_player == 'player' and not game_over:
-                # Player's move
-                mouse_pos = pygame.mouse.get_pos()
-                row = (mouse_pos[1] - PADDING_TOP) // CELL_SIZE
-                col = mouse_pos[0] // CELL_SIZE
+    while True:
+        if restart_game:
+            reset_game()
+            restart_game = False
+            current_player = 'player'
+            winner_sound_played = False  # Reset the winner sound played flag
+        game_over = False
+        winner = None
+
+        while not game_over:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    quit_game()
+
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                    restart_game = True  # Restart straight away, even while the AI is thinking
+
+                if event.type == pygame.VIDEOEXPOSE:
+                    renderer.invalidate() # The window was uncovered, paint it again
+
+                if event.type == pygame.MOUSEBUTTONDOWN and current_player == 'player' and not game_over:
+                    # Player's move
+                    mouse_pos = pygame.mouse.get_pos()
+                    row = (mouse_pos[1] - PADDING_TOP) // CELL_SIZE
+                    col = mouse_pos[0] // CELL_SIZE
+
+                    if is_valid_move(row, col):
+                        grid[row][col] = 'player'
+                        winner = check_winner(row, col)
+                        if winner is not None:
+                            game_over = True
+                            ai_worker.cancel()  # Stop pondering, nothing is left to think about on the game over screen
+
+                        current_player = 'ai'
+                        sounds.play('player')  # Play the player move sound
+
+            if restart_game:
+                break
 
-                if is_valid_move(row, col):
-                    grid[row][col] = 'player'
-                    winner = check_winner()
-                    if winner is not None:
-                        game_over = True
+            if current_player == 'ai' and not game_over:
+                ai_make_move()  # Starts the search if it is not already running
+                move = ai_finished_move()
+                if move is not False:
+                    if move is None:
+                        game_over = True  # No cells left, it's a tie
+                    else:
+                        winner = check_winner(*move)
+                        if winner is not None:
+                            game_over = True
+
+                    current_player = 'player'
+
+            draw_grid()
+            if first_frame:
+                first_frame = False
+                if args.startup_time:
+                    print(f"First frame {(time.perf_counter() - (launched or LAUNCHED)) * 1000:.0f} ms after launch")
+            clock.tick(60)  # Limit the frame rate to 60 FPS
+            frame_stats.record(clock.get_rawtime())  # Time this frame took, without the wait
 
-                    current_player = 'ai'
-                    player_sound.play()  # Play the player move sound
+        if restart_game:
+            continue
 
-        draw_grid()
-        clock.tick(60)  # Limit the frame rate to 60 FPS
+        # Game over loop
+        while True:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    quit_game()
 
-    # Game over loop
-    while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_r:
+                        restart_game = True
 
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_r:
-                    restart_game = True
+                if event.type == pygame.VIDEOEXPOSE:
+                    renderer.invalidate() # The window was uncovered, paint it again
 
-        if restart_game:
-            break
+            if restart_game:
+                break
 
-        display_winner(winner) # Display the winner
-        text = custom_font.render("Press 'R' to play again", True, FONT_COLOUR_2) # Display the restart message
-        text_rect = text.get_rect(center=(WINDOW_SIZE[0] // 2, WINDOW_SIZE[1] - (PADDING_TOP // 2))) # Center the text
-        window.blit(text, text_rect) # Display the text
-        pygame.display.update() # Update the display
+            display_winner(winner) # Display the winner and the restart message
+            clock.tick(GAME_OVER_FPS) # Nothing moves on this screen, so check for input less often
 
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+import pygame
+
+# Draws the board by repainting only the cells that changed since the last frame.
+# The background and grid lines are composited once into an off-screen surface,
+# and an empty cell is redrawn by copying its square back from that surface.
+# Every surface is converted to the display's pixel format when it is made, and
+# each player's square is a pre-filled tile, so drawing a frame is plain copies.
+
+TEXT_CACHE_SIZE = 64  # Rendered strings kept before the cache starts over
+
+
+class TextCache:
+    # Rasterising a TTF string is slow, so each (string, colour, font) is rendered once
+    def __init__(self):
+        self.surfaces = {}
+
+    def render(self, font, text, colour):
+        key = (text, colour, font)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            if len(self.surfaces) >= TEXT_CACHE_SIZE:
+                self.surfaces.clear()
+            surface = self.surfaces[key] = font.render(text, True, colour).convert_alpha()  # Antialiased text keeps its alpha
+        return surface
+
+
+text_cache = TextCache()
+
+
+class BoardRenderer:
+    def __init__(self, window, background, grid_size, cell_size, padding_top, colours, font, font_colour, footer_colour):
+        self.window = window
+        self.grid_size = grid_size
+        self.cell_size = cell_size
+        self.padding_top = padding_top
+        self.colours = colours  # Fill colour for each symbol the grid can hold
+        self.font = font
+        self.font_colour = font_colour  # Colour of the header text above the grid
+        self.footer_colour = footer_colour  # Colour of the footer text drawn over the bottom row
+
+        self.base = pygame.Surface(window.get_size()).convert()  # Background plus grid lines, drawn once
+        self.base.fill((255, 255, 255))  # Fill with white
+        self.base.blit(background, (0, 0))  # Draw the background image
+        for row in range(grid_size):
+            for col in range(grid_size):
+                pygame.draw.rect(self.base, (0, 0, 0), self.cell_rect(row, col), 1)  # Draw grid lines
+        self.tiles = {symbol: self.tile(colour) for symbol, colour in colours.items()}  # A filled square for each player
+
+        self.header_rect = pygame.Rect(0, 0, window.get_width(), padding_top)  # Strip above the grid used for messages
+        self.footer_centre = (window.get_width() // 2, window.get_height() - (padding_top // 2))
+        self.footer = None  # Footer text currently on screen
+        self.invalidate()
+
+    def cell_rect(self, row, col):
+        return pygame.Rect(col * self.cell_size, (row * self.cell_size) + self.padding_top, self.cell_size, self.cell_size)
+
+    def tile(self, colour):
+        tile = pygame.Surface((self.cell_size, self.cell_size)).convert()
+        tile.fill(colour)
+        return tile
+
+    def invalidate(self): # Repaint the whole window on the next frame, e.g. after something else drew over it
+        self.shown = [[None] * self.grid_size for _ in range(self.grid_size)]  # Symbol currently on screen in each cell
+        self.stamp = None  # Board hash when the cells were last drawn
+        self.header = None  # Header text currently on screen
+        self.full_redraw = True
+
+    def draw_cell(self, row, col, symbol):
+        rect = self.cell_rect(row, col)
+        if symbol in self.tiles:
+            self.window.blit(self.tiles[symbol], rect)  # Draw the player's square
+        else:
+            self.window.blit(self.base, rect, rect)  # Copy the empty square back from the background
+        self.shown[row][col] = symbol
+        return rect
+
+    def draw(self, grid, header=None, footer=None): # Update the screen, returns the rectangles that changed
+        dirty = []
+        if self.footer is not None and footer != self.footer:
+            self.full_redraw = True  # The old footer covered part of the grid
+        full = self.full_redraw
+        if full:
+            self.window.blit(self.base, (0, 0))
+            dirty.append(self.window.get_rect())
+
+        if full or grid.board.hash != self.stamp:  # Nothing to compare if no stone was placed or removed
+            for row in range(self.grid_size):
+                for col in range(self.grid_size):
+                    symbol = grid[row][col]
+                    if full:
+                        if symbol in self.colours:
+                            self.draw_cell(row, col, symbol)
+                        else:
+                            self.shown[row][col] = symbol
+                    elif symbol != self.shown[row][col]:
+                        dirty.append(self.draw_cell(row, col, symbol))
+            self.stamp = grid.board.hash
+
+        if full or header != self.header:
+            self.window.blit(self.base, self.header_rect, self.header_rect)
+            if header is not None:
+                text = text_cache.render(self.font, header, self.font_colour)
+                self.window.blit(text, text.get_rect(center=self.header_rect.center))
+            self.header = header
+            if not full:
+                dirty.append(self.header_rect)
+
+        if footer is not None and (full or footer != self.footer):
+            text = text_cache.render(self.font, footer, self.footer_colour)
+            text_rect = text.get_rect(center=self.footer_centre)
+            self.window.blit(text, text_rect)
+            if not full:
+                dirty.append(text_rect)
+        self.footer = footer
+
+        self.full_redraw = False
+        if dirty:
+            pygame.display.update(dirty)  # Idle frames skip the display update entirely
+        return dirty
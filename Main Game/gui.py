@@ -1,17 +1,31 @@
+import time
+
+LAUNCHED = time.perf_counter()  # When the launcher started, so --startup-time includes the menu and the imports
+
+import os
+import sys
 import tkinter as tk
 from tkinter import ttk
-import subprocess
+
+GAME_DIR = os.path.dirname(os.path.abspath(__file__))  # The "Main Game" folder
+chosen = []  # The opponent picked on the menu, the game starts once the menu has closed
 
 def start_game(opponent, root):
-    if opponent == "AI":
+    if opponent in ("AI", "Player"):
+        chosen.append(opponent)
         root.destroy()  # Close the Tkinter window
-        subprocess.Popen(["python", "Main Game\Pygame\maingameai.py"])  # Path to the AI version of the game
-    elif opponent == "Player":
-        root.destroy()  # Close the Tkinter window
-        subprocess.Popen(["python", "Main Game\Pygame\maingame2p.py"])  # Path to the 2-player version of the game 
     else:
         pass
 
+def run_game(opponent):
+    # Runs the game in this process, so it starts without a second Python interpreter loading everything again
+    sys.path.insert(0, os.path.join(GAME_DIR, 'Pygame'))
+    if opponent == "AI":
+        import maingameai as game  # The AI version of the game
+    else:
+        import maingame2p as game  # The 2-player version of the game
+    game.main(sys.argv[1:], LAUNCHED)  # Settings such as --size or --startup-time are passed on to the game
+
 def create_menu_screen():
     root = tk.Tk()
     root.title("Game Menu")
@@ -26,7 +40,7 @@ def create_menu_screen():
     root.geometry(f"{window_width}x{window_height}+{x}+{y}")
 
     # Load and resize the custom image background
-    custom_image = tk.PhotoImage(file="Main Game\Backgrounds\DALL·E 2023-07-15 21.20.00 - digital art depicting a hexagon background with various shades of green.png")  # Custom background image
+    custom_image = tk.PhotoImage(file=os.path.join(GAME_DIR, "Backgrounds", "DALL·E 2023-07-15 21.20.00 - digital art depicting a hexagon background with various shades of green.png"))  # Custom background image
     bg_label = tk.Label(root, image=custom_image)
     bg_label.place(x=0, y=0, relwidth=1, relheight=2)  # Set the image as the background
 
@@ -47,3 +61,5 @@ def create_menu_screen():
     root.mainloop()
 
 create_menu_screen()
+if chosen:
+    run_game(chosen[0])
@@ -0,0 +1,125 @@
+# Plays many matches against a running server and reports matches per second and move round-trip latency
+# Usage: python "Network Game/loadtest.py" --matches 1000 --concurrency 200 --mode pvp
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')) # Make the shared engine importable
+
+from engine.arena import percentile
+from server import HOST, LINE_LIMIT, PORT
+
+# Load test constants
+MATCHES = 200 # Matches to play in total
+CONCURRENCY = 50 # Matches in progress at once
+MODE = 'pvp' # 'pvp' for two clients per match, 'ai' for one client against the server's AI
+
+
+class Client:
+    # One connection that plays random legal moves and times how long each move takes to come back
+    def __init__(self, reader, writer, rng):
+        self.reader = reader
+        self.writer = writer
+        self.rng = rng
+        self.latencies = []  # Seconds from sending a move until the server echoed it
+
+    async def send(self, message):
+        self.writer.write(json.dumps(message).encode() + b'\n')
+        await self.writer.drain()
+
+    async def receive(self):
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("the server closed the connection")
+        return json.loads(line)
+
+    async def play(self, join): # Join a match and play it to the end, returns the over message
+        await self.send(join)
+        message = await self.receive()
+        while message['type'] == 'waiting':
+            message = await self.receive()
+        if message['type'] != 'start':
+            raise RuntimeError(f"could not join: {message}")
+        side, size = message['side'], message['size']
+        empty = {(row, col) for row in range(size) for col in range(size)}
+        turn = 0
+        sent = None
+        while True:
+            if turn == side and sent is None:
+                move = self.rng.choice(sorted(empty))
+                sent = time.perf_counter()
+                await self.send({'type': 'move', 'row': move[0], 'col': move[1]})
+            message = await self.receive()
+            if message['type'] == 'moved':
+                empty.discard((message['row'], message['col']))
+                if message['side'] == side:
+                    self.latencies.append(time.perf_counter() - sent)
+                    sent = None
+                turn = 1 - message['side']
+            elif message['type'] == 'over':
+                return message
+            elif message['type'] == 'error':
+                raise RuntimeError(message['message'])
+
+    def close(self):
+        self.writer.close()
+
+
+async def connect(host, port, seed):
+    reader, writer = await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+    return Client(reader, writer, random.Random(seed))
+
+
+async def run_match(host, port, mode, seed, size):
+    join = {'type': 'join', 'mode': mode}
+    if size:
+        join['size'] = size
+    clients = [await connect(host, port, seed * 2 + seat) for seat in range(2 if mode == 'pvp' else 1)]
+    try:
+        await asyncio.gather(*(client.play(join) for client in clients))
+    finally:
+        for client in clients:
+            client.close()
+    return [seconds for client in clients for seconds in client.latencies]
+
+
+async def load_test(host, port, matches, concurrency, mode, size=None):
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(seed):
+        async with slots:
+            latencies.extend(await run_match(host, port, mode, seed, size))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(seed) for seed in range(matches)))
+    elapsed = time.perf_counter() - start
+    return {
+        'matches': matches,
+        'seconds': round(elapsed, 3),
+        'matches_per_second': round(matches / elapsed, 1),
+        'moves': len(latencies),
+        'latency_ms': {name: round(percentile(latencies, fraction) * 1000, 2) for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99))},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test for the four in a row server")
+    parser.add_argument('--host', default=HOST, help="server address")
+    parser.add_argument('--port', type=int, default=PORT, help="server TCP port")
+    parser.add_argument('--matches', type=int, default=MATCHES, help="matches to play in total")
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help="matches in progress at once")
+    parser.add_argument('--mode', choices=('pvp', 'ai'), default=MODE, help="two clients per match, or one against the AI")
+    parser.add_argument('--size', type=int, default=None, help="board size to ask for (default: the server's)")
+    args = parser.parse_args(argv)
+    report = asyncio.run(load_test(args.host, args.port, args.matches, args.concurrency, args.mode, args.size))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+# Hosts four in a row matches over TCP, two players or a player against the AI, many at once in one process
+# Usage: python "Network Game/server.py" --port 8765 --ai-workers 4
+#
+# Messages are JSON objects, one per line. A client sends
+#   {"type": "join", "mode": "pvp" or "ai", "size": 11, "win_length": 4}   size and win_length are optional,
+#                                                                    "ai_first": true lets the AI open an ai match
+#   {"type": "move", "row": 5, "col": 5}
+# and the server answers with
+#   {"type": "waiting"}                                              until a second player joins a pvp match
+#   {"type": "start", "match": 1, "side": 0, "size": 11, "win_length": 4}   side 0 moves first
+#   {"type": "moved", "side": 0, "row": 5, "col": 5}                 every move, sent to both players
+#   {"type": "over", "winner": 0 or 1 or null, "reason": "line", "full", "left", "error" or "cancelled"}
+#                                                                    "error" and "cancelled" mean the AI could not move
+#   {"type": "error", "message": "..."}                              the request was ignored
+# After "over" the same connection can join another match.
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')) # Make the shared engine importable
+
+from engine.bitboard import BitBoard
+from engine.book import OpeningBook, search_position
+from engine.parallel import worker_pool
+from engine.rules import Rules, add_rules_arguments, rules_from_args
+
+# Server constants
+HOST = '127.0.0.1' # Only local clients unless --host says otherwise
+PORT = 8765 # TCP port the server listens on
+AI_TIME_LIMIT_MS = 200 # How long the AI may think about one move (milliseconds)
+AI_DEPTH = 8 # Deepest search the AI tries within its time limit
+AI_WORKERS = 0 # Processes the AI moves run in (0 for one per CPU)
+AI_TABLE_MB = 16 # Transposition table of each AI process (megabytes)
+LINE_LIMIT = 4096 # Longest message a client may send (bytes)
+
+
+class Match:
+    # One game: its board and the two seats, each a Player or None for the AI
+    __slots__ = ('id', 'board', 'seats', 'turn', 'over')
+
+    def __init__(self, match_id, rules, seats):
+        self.id = match_id
+        self.board = BitBoard(rules.size, rules.win_length)  # Two ints and the move list
+        self.seats = seats
+        self.turn = 0  # Side to move
+        self.over = False
+
+    def play(self, side, row, col): # Place a stone for `side`, returning an error message if the move is not allowed
+        if self.over:
+            return "the match is over"
+        if side != self.turn:
+            return "not your turn"
+        if not self.board.on_board(row, col) or not self.board.is_empty(self.board.index(row, col)):
+            return "that cell is taken or off the board"
+        self.board.place(self.board.index(row, col), side)
+        self.turn = 1 - side
+        return None
+
+    def result(self, side): # (winner, reason) after `side` moved, or None while the game goes on
+        if self.board.has_won(side):
+            return side, 'line'
+        if self.board.is_full():
+            return None, 'full'
+        return None
+
+
+class Player:
+    # One client connection
+    __slots__ = ('writer', 'match', 'side')
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.match = None
+        self.side = None
+
+    def send(self, message):
+        if not self.writer.is_closing():
+            self.writer.write(json.dumps(message, separators=(',', ':')).encode() + b'\n')
+
+
+class GameServer:
+    def __init__(self, rules, ai_ms=AI_TIME_LIMIT_MS, ai_depth=AI_DEPTH, ai_workers=AI_WORKERS, table_mb=AI_TABLE_MB):
+        self.rules = rules  # Used when a join message does not give a size
+        self.ai_ms = ai_ms or None
+        self.ai_depth = ai_depth
+        self.pool = worker_pool(ai_workers or os.cpu_count() or 1, table_mb)  # AI searches run here, never on the event loop
+        self.book = OpeningBook()  # Probing is a few microseconds, so it is done on the event loop
+        self.ids = itertools.count(1)
+        self.waiting = {}  # (size, win_length) -> Player waiting for an opponent
+        self.matches = 0  # Matches in progress
+        self.finished = 0
+
+    async def serve(self, host=HOST, port=PORT):
+        server = await asyncio.start_server(self.handle, host, port, limit=LINE_LIMIT)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    async def handle(self, reader, writer):
+        player = Player(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    break  # Line too long or the connection dropped
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    kind = message['type']
+                except (ValueError, TypeError, KeyError):
+                    player.send({'type': 'error', 'message': "expected a JSON object with a type"})
+                    continue
+                if kind == 'join':
+                    self.join(player, message)
+                elif kind == 'move':
+                    self.move(player, message)
+                else:
+                    player.send({'type': 'error', 'message': f"unknown message type {kind!r}"})
+                await writer.drain()
+        finally:
+            self.leave(player)
+            writer.close()
+
+    def join(self, player, message):
+        if player.match is not None or player in self.waiting.values():
+            player.send({'type': 'error', 'message': "already in a match"})
+            return
+        try:
+            rules = Rules(int(message.get('size', self.rules.size)), int(message.get('win_length', self.rules.win_length)))
+        except (ValueError, TypeError) as error:
+            player.send({'type': 'error', 'message': str(error)})
+            return
+        mode = message.get('mode', 'pvp')
+        if mode == 'ai':
+            self.start(rules, [None, player] if message.get('ai_first') else [player, None])
+        elif mode == 'pvp':
+            key = (rules.size, rules.win_length)
+            opponent = self.waiting.pop(key, None)
+            if opponent is None:
+                self.waiting[key] = player
+                player.send({'type': 'waiting'})
+            else:
+                self.start(rules, [opponent, player])  # Whoever waited moves first
+        else:
+            player.send({'type': 'error', 'message': f"unknown mode {mode!r}"})
+
+    def start(self, rules, seats):
+        match = Match(next(self.ids), rules, seats)
+        self.matches += 1
+        for side, player in enumerate(seats):
+            if player is not None:
+                player.match, player.side = match, side
+                player.send({'type': 'start', 'match': match.id, 'side': side, 'size': rules.size, 'win_length': rules.win_length})
+        if seats[0] is None:
+            self.ai_move(match, 0)
+
+    def move(self, player, message):
+        match = player.match
+        if match is None:
+            player.send({'type': 'error', 'message': "not in a match"})
+            return
+        try:
+            row, col = int(message['row']), int(message['col'])
+        except (KeyError, ValueError, TypeError):
+            player.send({'type': 'error', 'message': "a move needs a row and a col"})
+            return
+        error = match.play(player.side, row, col)
+        if error is not None:
+            player.send({'type': 'error', 'message': error})
+            return
+        self.moved(match, player.side, row, col)
+        if not match.over and match.seats[match.turn] is None:
+            self.ai_move(match, match.turn)
+
+    def moved(self, match, side, row, col): # Tell both players about a move and finish the match if it decided the game
+        for player in match.seats:
+            if player is not None:
+                player.send({'type': 'moved', 'side': side, 'row': row, 'col': col})
+        result = match.result(side)
+        if result is not None:
+            self.end(match, *result)
+
+    def end(self, match, winner, reason):
+        match.over = True
+        self.matches -= 1
+        self.finished += 1
+        for player in match.seats:
+            if player is not None:
+                player.send({'type': 'over', 'winner': winner, 'reason': reason})
+                player.match = player.side = None
+
+    def leave(self, player):
+        for key, waiting in list(self.waiting.items()):
+            if waiting is player:
+                del self.waiting[key]
+        match = player.match
+        if match is not None and not match.over:
+            self.end(match, 1 - player.side, 'left')  # The opponent wins a match its owner walked away from
+
+    def ai_move(self, match, side): # Start the AI's search in the process pool and play its move when it comes back
+        board = match.board
+        hit = self.book.probe(board, side)
+        if hit is not None:
+            self.ai_played(match, side, hit[0])
+            return
+        future = asyncio.get_running_loop().run_in_executor(
+            self.pool, search_position, board.size, board.win_length, list(board.history), list(board.stones), side, self.ai_ms, self.ai_depth)
+        future.add_done_callback(lambda done: self.ai_searched(match, side, done))
+
+    def ai_searched(self, match, side, future): # The AI's search came back: play its move, or end the match if it has none
+        if match.over:
+            return
+        if future.cancelled():
+            self.end(match, None, 'cancelled')  # The pool was shut down under it
+            return
+        try:
+            move = future.result()[0]
+        except Exception as error:  # Such as a worker process that died
+            print(f"AI move in match {match.id} failed: {error!r}", file=sys.stderr)
+            self.end(match, None, 'error')
+            return
+        self.ai_played(match, side, move)
+
+    def ai_played(self, match, side, move):
+        if match.over:
+            return  # The player left while the AI was thinking
+        if move is None:
+            self.end(match, None, 'full')
+            return
+        row, col = match.board.cell(move)
+        match.play(side, row, col)
+        self.moved(match, side, row, col)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Four in a row server for many matches at once")
+    parser.add_argument('--host', default=HOST, help="address to listen on")
+    parser.add_argument('--port', type=int, default=PORT, help="TCP port to listen on")
+    parser.add_argument('--ai-ms', type=int, default=AI_TIME_LIMIT_MS, help="time the AI may think about each move, in milliseconds (0 for no limit)")
+    parser.add_argument('--ai-depth', type=int, default=AI_DEPTH, help="deepest search the AI tries, in plies")
+    parser.add_argument('--ai-workers', type=int, default=AI_WORKERS, help="processes the AI moves run in, 0 for one per CPU")
+    add_rules_arguments(parser)
+    args = parser.parse_args(argv)
+    rules = rules_from_args(parser, args) # Default board size and win length for matches
+    server = GameServer(rules, args.ai_ms, args.ai_depth, args.ai_workers)
+    print(f"Listening on {args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+# Micro-benchmarks for the shared engine, run with `python -m benchmarks.<name>` from the repository root
@@ -0,0 +1,50 @@
+# Positions analysed per second by analyse_batch() with 1, 2, 4, ... worker processes
+# Usage: python -m benchmarks.analysis [positions] [depth]
+import os
+import random
+import sys
+import time
+
+from engine.analysis import Budget, analyse_batch
+from engine.bitboard import BitBoard
+
+POSITIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000  # Size of the corpus
+DEPTH = int(sys.argv[2]) if len(sys.argv) > 2 else 2  # Fixed depth, so every run does the same work
+
+
+def corpus(count, seed=0): # Positions from random games, none of them already won
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = BitBoard()
+        cells = list(board.legal_moves())
+        rng.shuffle(cells)
+        for ply, index in enumerate(cells[:rng.randint(2, 30)]):
+            board.place(index, ply % 2)
+            if board.winner() is not None:
+                break
+        if board.winner() is None:
+            positions.append(board)
+    return positions
+
+
+def main():
+    positions = corpus(POSITIONS)
+    budget = Budget(DEPTH, None)
+    counts = [1]
+    while counts[-1] * 2 <= (os.cpu_count() or 1):
+        counts.append(counts[-1] * 2)
+    print(f"{POSITIONS} positions, depth {DEPTH}")
+    print(f"{'workers':>7} {'seconds':>8} {'positions/s':>12} {'speedup':>8}")
+    baseline = None
+    for workers in counts:
+        start = time.perf_counter()
+        for _ in analyse_batch(positions, budget, workers):
+            pass
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>7} {elapsed:>8.2f} {POSITIONS / elapsed:>12.0f} {baseline / elapsed:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
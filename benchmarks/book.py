@@ -0,0 +1,38 @@
+# Time to answer the opening moves with and without the opening book
+# Usage: python -m benchmarks.book [ms]
+import sys
+import time
+
+from engine.bitboard import BitBoard
+from engine.book import OpeningBook
+from engine.search import MAX_DEPTH, Searcher
+
+BUDGET_MS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000  # Search time when the book has no answer
+
+
+def opening_positions(board): # The empty board, then a stone in the centre and in a corner
+    positions = [(BitBoard(board.size, board.win_length), 0)]
+    for row, col in ((board.size // 2, board.size // 2), (0, 0)):
+        position = BitBoard(board.size, board.win_length)
+        position.place(position.index(row, col), 0)
+        positions.append((position, 1))
+    return positions
+
+
+def main():
+    book = OpeningBook()
+    print(f"book: {book.count} positions with up to {book.stones} stones")
+    print(f"{'stones':>6} {'search ms':>10} {'book us':>8}")
+    for board, side in opening_positions(BitBoard()):
+        start = time.perf_counter()
+        Searcher(board, MAX_DEPTH, BUDGET_MS).search(side)
+        search_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for _ in range(1000):
+            found = book.probe(board, side)
+        book_us = (time.perf_counter() - start) * 1000  # 1000 probes, so milliseconds become microseconds each
+        print(f"{len(board.history):>6} {search_ms:>10.1f} {book_us if found else float('nan'):>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+# Branching factor of the candidate-move generator against the full sweep of empty cells
+import random
+
+from benchmarks.search import midgame_position
+from engine.candidates import candidate_tracker
+
+
+def main():
+    rng = random.Random(2023)
+    print(f"{'stones':>6} {'empty cells':>12} {'distance 1':>11} {'distance 2':>11}")
+    for plies in (1, 4, 8, 16, 32, 48):
+        empty = near = far = 0
+        samples = 20
+        for _ in range(samples):
+            board, _ = midgame_position(plies, rng)
+            empty += len(list(board.legal_moves()))
+            near += len(candidate_tracker(board, 1).moves())
+            far += len(candidate_tracker(board, 2).moves())
+        print(f"{plies:>6} {empty / samples:>12.1f} {near / samples:>11.1f} {far / samples:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# Compare the old full-board check_winner() with the last-move and bitboard checkers
+import random
+import timeit
+
+from engine.bitboard import BitBoard
+from engine.rules import GRID_SIZE, WIN_LENGTH
+
+EMPTY_CELL = None
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))  # Horizontal, vertical, diagonal, anti-diagonal
+
+
+def legacy_check_winner(grid): # The scan previously copied into every front-end
+    for row in range(GRID_SIZE):
+        for col in range(GRID_SIZE):
+            if grid[row][col] is not None:
+                if col + 3 < GRID_SIZE and all(grid[row][c] == grid[row][col] for c in range(col, col + 4)):
+                    return grid[row][col]
+
+                if row + 3 < GRID_SIZE and all(grid[r][col] == grid[row][col] for r in range(row, row + 4)):
+                    return grid[row][col]
+
+                if row + 3 < GRID_SIZE and col + 3 < GRID_SIZE:
+                    if all(grid[row + i][col + i] == grid[row][col] for i in range(4)):
+                        return grid[row][col]
+                    if all(grid[row + i][col - i] == grid[row][col] for i in range(4)):
+                        return grid[row][col]
+
+    return None
+
+
+def count_direction(grid, row, col, d_row, d_col, limit): # Matching tiles walking away from (row, col), at most `limit`
+    player = grid[row][col]
+    count = 0
+    r, c = row + d_row, col + d_col
+    while count < limit and 0 <= r < GRID_SIZE and 0 <= c < GRID_SIZE and grid[r][c] == player:
+        count += 1
+        r += d_row
+        c += d_col
+    return count
+
+
+def winner_at(grid, row, col): # The list-of-lists checker the front-ends used before the bitboard: only lines through the last move
+    need = WIN_LENGTH - 1
+    for d_row, d_col in DIRECTIONS:
+        forward = count_direction(grid, row, col, d_row, d_col, need)
+        if forward == need or forward + count_direction(grid, row, col, -d_row, -d_col, need - forward) == need:
+            return grid[row][col]
+    return None
+
+
+def random_position(plies, rng): # Play random moves, stopping before any move that would win
+    grid = [[EMPTY_CELL] * GRID_SIZE for _ in range(GRID_SIZE)]
+    cells = [(row, col) for row in range(GRID_SIZE) for col in range(GRID_SIZE)]
+    rng.shuffle(cells)
+    players = ('player', 'ai')
+    last = None
+    placed = 0
+    for row, col in cells:
+        if placed == plies:
+            break
+        grid[row][col] = players[placed % 2]
+        if winner_at(grid, row, col) is not None:
+            grid[row][col] = EMPTY_CELL
+            continue
+        last = (row, col)
+        placed += 1
+    return grid, last
+
+
+def to_bitboard(grid, last): # Same position as a BitBoard, with the last move's side
+    board = BitBoard(GRID_SIZE)
+    for row in range(GRID_SIZE):
+        for col in range(GRID_SIZE):
+            if grid[row][col] is not None:
+                board.place(board.index(row, col), 0 if grid[row][col] == 'player' else 1)
+    return board, board.side_at(board.index(*last))
+
+
+def bench(label, positions, number):
+    boards = [to_bitboard(grid, last) for grid, last in positions]
+    legacy = timeit.timeit(lambda: [legacy_check_winner(grid) for grid, _ in positions], number=number)
+    incremental = timeit.timeit(lambda: [winner_at(grid, *last) for grid, last in positions], number=number)
+    bitboard = timeit.timeit(lambda: [board.has_won(side) for board, side in boards], number=number)
+    calls = len(positions) * number
+    print(f"{label:<10} legacy {legacy / calls * 1e6:8.2f} us/call   last-move {incremental / calls * 1e6:8.2f} us/call   "
+          f"bitboard {bitboard / calls * 1e6:8.2f} us/call   speedup {legacy / incremental:6.1f}x / {legacy / bitboard:6.1f}x")
+
+
+def main():
+    rng = random.Random(2023)
+    bench("random", [random_position(rng.randint(5, 40), rng) for _ in range(200)], 20)
+    bench("late-game", [random_position(90, rng) for _ in range(200)], 20)
+
+
+if __name__ == '__main__':
+    main()
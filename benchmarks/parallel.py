@@ -0,0 +1,49 @@
+# Speedup of the root-parallel search over the single-process search at a fixed depth
+# Usage: python -m benchmarks.parallel [depth [workers ...]]
+import os
+import random
+import sys
+import time
+
+from benchmarks.search import played_position
+from engine.parallel import ParallelSearcher, worker_pool
+from engine.search import Searcher
+
+DEPTH = int(sys.argv[1]) if len(sys.argv) > 1 else 4  # Fixed depth, so every worker count does the same search
+WORKERS = [int(arg) for arg in sys.argv[2:]] or sorted({1, 2, 4, 8, 16, os.cpu_count() or 1})  # Worker counts to try
+
+
+def main():
+    rng = random.Random(2023)
+    positions = [played_position(rng.randint(4, 16), rng) for _ in range(10)]
+    print(f"{len(positions)} positions, depth {DEPTH}, {os.cpu_count()} CPUs")
+
+    serial_moves = []
+    start = time.perf_counter()
+    nodes = 0
+    for board, side in positions:
+        searcher = Searcher(board, DEPTH)
+        serial_moves.append(searcher.search(side)[0])
+        nodes += searcher.nodes
+    serial = time.perf_counter() - start
+
+    print(f"{'workers':>7} {'avg ms':>8} {'speedup':>8} {'avg nodes':>10} {'same move':>10}")
+    print(f"{'serial':>7} {serial / len(positions) * 1000:>8.1f} {1:>8.2f} {nodes / len(positions):>10.0f} {len(positions):>7}/{len(positions)}")
+    for workers in WORKERS:
+        pool = worker_pool(workers)
+        list(pool.map(int, range(workers)))  # Keep process start-up out of the timings
+        elapsed = 0.0
+        nodes = same = 0
+        for (board, side), serial_move in zip(positions, serial_moves):
+            searcher = ParallelSearcher(board, DEPTH, workers=workers, executor=pool)
+            start = time.perf_counter()
+            move, score = searcher.search(side)
+            elapsed += time.perf_counter() - start
+            nodes += searcher.nodes
+            same += move == serial_move
+        pool.shutdown()
+        print(f"{workers:>7} {elapsed / len(positions) * 1000:>8.1f} {serial / elapsed:>8.2f} {nodes / len(positions):>10.0f} {same:>7}/{len(positions)}")
+
+
+if __name__ == '__main__':
+    main()
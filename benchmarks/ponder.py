@@ -0,0 +1,49 @@
+# AI response time with and without pondering, against an opponent that takes its time
+# Usage: python -m benchmarks.ponder [games] [think_ms] [depth]
+import sys
+import time
+
+from engine.agents import make_agent
+from engine.bitboard import BitBoard
+from engine.tt import TranspositionTable
+from engine.worker import SearchWorker
+
+GAMES = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+THINK_MS = int(sys.argv[2]) if len(sys.argv) > 2 else 500  # How long the opponent "thinks" before each move
+DEPTH = int(sys.argv[3]) if len(sys.argv) > 3 else 5  # The AI searches to this depth with no time limit, so both runs play alike
+OPPONENT = 'alphabeta:ms=50'
+
+
+def play(worker, opponent):
+    board = BitBoard()
+    opponent.reset()
+    while not board.is_full():
+        move = opponent.choose(board, 0)
+        time.sleep(THINK_MS / 1000)  # The player is still thinking, the AI may ponder meanwhile
+        board.place(move, 0)
+        if board.has_won(0):
+            break
+        worker.start(board, 1)
+        move, score = worker.result()
+        board.place(move, 1)
+        if board.has_won(1):
+            break
+        worker.ponder(board, 1)
+    worker.cancel()
+
+
+def main():
+    print(f"{GAMES} games against {OPPONENT}, opponent thinks {THINK_MS} ms, AI depth {DEPTH}")
+    print(f"{'ponder':<7} {'moves':>6} {'mean ms':>8} {'hit rate':>9}")
+    for ponder in (False, True):
+        worker = SearchWorker(DEPTH, None, TranspositionTable(64), None, ponder=ponder)
+        for game in range(GAMES):
+            worker.tt.clear()
+            play(worker, make_agent(OPPONENT, game))
+        stats = worker.ponder_stats()
+        print(f"{'on' if ponder else 'off':<7} {len(worker.response_times):>6} {stats['mean_response_ms']:>8.0f} {stats['ponder_hit_rate']:>9.0%}")
+        worker.shutdown()
+
+
+if __name__ == '__main__':
+    main()
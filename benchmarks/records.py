@@ -0,0 +1,58 @@
+# Writing, streaming and replaying saved games, on random games in a temporary folder
+# Usage: python -m benchmarks.records [games]
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+from engine.bitboard import BitBoard
+from engine.records import RecordWriter, analyse, read_records, segment_paths
+
+GAMES = int(sys.argv[1]) if len(sys.argv) > 1 else 100000  # Games to write and read back
+
+
+def random_game(rng):
+    board = BitBoard()
+    cells = list(board.legal_moves())
+    rng.shuffle(cells)
+    for ply, index in enumerate(cells):
+        board.place(index, ply % 2)
+        if board.has_won(ply % 2):
+            break
+    return board
+
+
+def main():
+    rng = random.Random(0)
+    boards = [random_game(rng) for _ in range(1000)]  # Written over and over, so the timing is the writer's
+    with tempfile.TemporaryDirectory() as directory:
+        writer = RecordWriter(directory)
+        start = time.perf_counter()
+        for game in range(GAMES):
+            writer.append(boards[game % len(boards)])
+        writer.close()
+        written = time.perf_counter() - start
+        size = sum(os.path.getsize(path) for path in segment_paths(directory))
+
+        start = time.perf_counter()
+        moves = sum(len(record.moves) for record in read_records([directory]))
+        read = time.perf_counter() - start
+
+        start = time.perf_counter()
+        analyse(read_records([directory]))
+        replayed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        analyse(read_records([directory]), io.StringIO())
+        evaluated = time.perf_counter() - start
+
+    print(f"{GAMES} games, {moves} moves, {size / GAMES:.1f} bytes per game")
+    print(f"{'step':<22} {'games/s':>10} {'moves/s':>11}")
+    for name, seconds in (('write', written), ('stream', read), ('replay', replayed), ('replay + evaluate', evaluated)):
+        print(f"{name:<22} {GAMES / seconds:>10.0f} {moves / seconds:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+# Cost of the blits the pygame clients make each frame, with unconverted alpha surfaces and with the pre-baked ones
+# Usage: python -m benchmarks.render [size]
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')  # No window needed to time blits
+
+import pygame
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Main Game', 'Pygame'))
+
+from assets import flatten
+
+SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 11  # Board size, the window is sized like the clients size it
+CELL_SIZE = min(50, 800 // SIZE)
+WINDOW_SIZE = (SIZE * CELL_SIZE, SIZE * CELL_SIZE + 50)
+ALPHA = 200  # Same transparency as the clients' background
+BLITS = 200  # Repeats of each measurement
+
+
+def timed(draw):
+    start = time.perf_counter()
+    for _ in range(BLITS):
+        draw()
+    return (time.perf_counter() - start) / BLITS * 1e6
+
+
+def main():
+    pygame.display.init()
+    window = pygame.display.set_mode(WINDOW_SIZE)
+    image = pygame.Surface(WINDOW_SIZE, pygame.SRCALPHA, 32)  # Stands in for the PNG, which loads in its own format
+    image.fill((40, 160, 80, 255))
+    raw = image.copy()
+    raw.set_alpha(ALPHA)
+    baked = flatten(image, ALPHA)  # Opaque and in the display's format
+
+    rect = pygame.Rect(0, 50, CELL_SIZE, CELL_SIZE)
+    tile = pygame.Surface(rect.size).convert()
+    tile.fill((66, 73, 255))
+
+    print(f"window {WINDOW_SIZE[0]}x{WINDOW_SIZE[1]}, cell {CELL_SIZE}px")
+    print(f"{'blit':<34} {'us':>8}")
+    print(f"{'background, alpha, unconverted':<34} {timed(lambda: window.blit(raw, (0, 0))):>8.1f}")
+    print(f"{'background, pre-baked':<34} {timed(lambda: window.blit(baked, (0, 0))):>8.1f}")
+    print(f"{'cell, draw.rect':<34} {timed(lambda: pygame.draw.rect(window, (66, 73, 255), rect)):>8.1f}")
+    print(f"{'cell, tile':<34} {timed(lambda: window.blit(tile, rect)):>8.1f}")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# Move latency and memory of the AI as the board grows
+# Usage: python -m benchmarks.scaling [budget_ms]
+import sys
+import time
+import tracemalloc
+
+from engine.bitboard import BitBoard
+from engine.search import MAX_DEPTH, Searcher
+from engine.tt import TranspositionTable
+
+BUDGET_MS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000  # Time the AI gets per move, as in the games
+FIXED_DEPTH = 3  # Depth for the fixed-work latency column
+BOARDS = [(7, 4), (11, 4), (15, 5), (19, 5), (25, 5), (32, 5), (32, 8)]  # (size, win length)
+STONES = 10  # Stones on the board before the timed move
+BAR_MS = 10  # Milliseconds per '#' in the latency chart
+
+
+def opening(board): # Stones played by a shallow search from the centre, the same every run
+    searcher = Searcher(board, depth=1)
+    side = 0
+    board.place(board.index(board.size // 2, board.size // 2), side)
+    while len(board.history) < STONES:
+        side = 1 - side
+        move, score = searcher.search(side)
+        board.place(move, side)
+        if board.winner() is not None:
+            board.undo()
+            break
+    return 1 - side
+
+
+def main():
+    print(f"{STONES} stones on the board, {BUDGET_MS} ms budget, fixed depth {FIXED_DEPTH}")
+    print(f"{'size':>4} {'win':>4} {'setup ms':>9} {'setup KB':>9} {'depth':>6} {'nodes/s':>8} {f'depth {FIXED_DEPTH} ms':>11} {'search KB':>9}  latency")
+    for size, win_length in BOARDS:
+        board = BitBoard(size, win_length)
+        tracemalloc.start()
+        start = time.perf_counter()
+        Searcher(board)  # First board of this shape builds its window tables and trackers
+        setup = time.perf_counter() - start
+        setup_kb = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+        side = opening(board)
+
+        table = TranspositionTable(64)
+        searcher = Searcher(board, MAX_DEPTH, BUDGET_MS, table)
+        start = time.perf_counter()
+        searcher.search(side)
+        elapsed = time.perf_counter() - start
+        depth_reached, nodes_per_second = searcher.depth_reached, searcher.nodes / elapsed
+
+        tracemalloc.start()
+        searcher = Searcher(board, FIXED_DEPTH, None, TranspositionTable(64))
+        start = time.perf_counter()
+        searcher.search(side)
+        fixed_ms = (time.perf_counter() - start) * 1000  # Includes the tracing overhead, so only compare rows
+        search_kb = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+        print(f"{size:>4} {win_length:>4} {setup * 1000:>9.1f} {setup_kb:>9.0f} {depth_reached:>6} {nodes_per_second:>8.0f} "
+              f"{fixed_ms:>11.1f} {search_kb:>9.0f}  {'#' * max(1, round(fixed_ms / BAR_MS))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# How deep the iterative-deepening search gets within a per-move budget, and how fast it visits nodes
+# Usage: python -m benchmarks.search [budget_ms ...]
+import random
+import sys
+import time
+
+from engine.bitboard import BitBoard
+from engine.search import MAX_DEPTH, Searcher, ordered_moves
+from engine.tt import TranspositionTable
+
+BUDGETS_MS = [int(arg) for arg in sys.argv[1:]] or [100, 300, 1000]  # Per-move budgets in milliseconds
+
+
+def midgame_position(plies, rng): # Random stones near the centre with no completed line
+    board = BitBoard()
+    side = 0
+    while len(board.history) < plies:
+        move = rng.choice(ordered_moves(board))
+        board.place(move, side)
+        if board.has_won(side):
+            board.undo()
+            continue
+        side = 1 - side
+    return board, side
+
+
+def played_position(plies, rng): # A few random opening stones, then both sides play a shallow search
+    board, side = midgame_position(2, rng)
+    searcher = Searcher(board, depth=2)
+    while len(board.history) < plies:
+        move, score = searcher.search(side)
+        board.place(move, side)
+        if board.has_won(side):
+            board.undo()
+            break
+        side = 1 - side
+    return board, side
+
+
+def main():
+    rng = random.Random(2023)
+    positions = [played_position(rng.randint(4, 16), rng) for _ in range(10)]
+    print(f"{len(positions)} positions, iterative deepening up to depth {MAX_DEPTH}")
+    print(f"{'budget ms':>9} {'table':>6} {'numpy':>6} {'symmetry':>9} {'avg depth':>10} {'avg nodes':>10} {'avg ms':>8} {'nodes/s':>9} {'tt hits':>8}")
+    for budget in BUDGETS_MS:
+        for use_table, vectorized, symmetric in ((False, False, False), (True, False, False), (True, True, False), (True, True, True)):
+            depth = nodes = 0
+            elapsed = 0.0
+            hit_rate = 0.0
+            for board, side in positions:
+                table = TranspositionTable(64) if use_table else None
+                searcher = Searcher(board, MAX_DEPTH, budget, table, vectorized=vectorized, symmetric=symmetric)
+                start = time.perf_counter()
+                searcher.search(side)
+                elapsed += time.perf_counter() - start
+                nodes += searcher.nodes
+                depth += searcher.depth_reached
+                if table is not None:
+                    hit_rate += table.stats()['hit_rate'] / len(positions)
+            print(f"{budget:>9} {'on' if use_table else 'off':>6} {'on' if vectorized else 'off':>6} {'on' if symmetric else 'off':>9} {depth / len(positions):>10.1f} "
+                  f"{nodes / len(positions):>10.0f} {elapsed / len(positions) * 1000:>8.1f} "
+                  f"{nodes / elapsed:>9.0f} {hit_rate:>8.1%}")
+
+
+if __name__ == '__main__':
+    main()
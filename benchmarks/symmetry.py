@@ -0,0 +1,33 @@
+# Transposition table use with and without symmetry-canonical keys, on opening positions
+# Usage: python -m benchmarks.symmetry [depth]
+import sys
+import time
+
+from engine.bitboard import BitBoard
+from engine.search import Searcher
+from engine.tt import TranspositionTable
+
+DEPTH = int(sys.argv[1]) if len(sys.argv) > 1 else 5  # Fixed depth, so both runs do the same search
+OPENINGS = [[], [(5, 5)], [(5, 5), (5, 6)], [(5, 5), (4, 4)], [(0, 0)], [(3, 5)]]  # Stones played so far, first player first
+
+
+def main():
+    print(f"depth {DEPTH}")
+    print(f"{'stones':<18} {'symmetry':>9} {'nodes':>7} {'ms':>7} {'tt hits':>8} {'entries':>8}")
+    for opening in OPENINGS:
+        for symmetric in (False, True):
+            board = BitBoard()
+            for turn, (row, col) in enumerate(opening):
+                board.place(board.index(row, col), turn % 2)
+            table = TranspositionTable(64)
+            searcher = Searcher(board, DEPTH, None, table, symmetric=symmetric)
+            start = time.perf_counter()
+            searcher.search(len(opening) % 2)
+            elapsed = time.perf_counter() - start
+            stats = table.stats()
+            print(f"{str(opening):<18} {'on' if symmetric else 'off':>9} {searcher.nodes:>7} {elapsed * 1000:>7.1f} "
+                  f"{stats['hit_rate']:>8.1%} {stats['used']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# Forced wins found by the threat-space solver, against the full-width search needed to prove them
+# Usage: python -m benchmarks.threats [positions]
+import random
+import sys
+import time
+
+from benchmarks.search import midgame_position
+from engine.search import WIN_SCORE, Searcher
+from engine.threats import ThreatSolver
+from engine.tt import TranspositionTable
+
+POSITIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 600  # Random positions to look through
+MIN_PLIES = 5  # Only wins at least this long are interesting
+MAX_PROOF_PLIES = 9  # Deepest full-width search run to confirm a win
+
+
+def main():
+    rng = random.Random(2023)
+    solver_nodes = solver_ms = search_nodes = search_ms = 0
+    wins = confirmed = 0
+    print(f"{'plies':>5} {'solver nodes':>13} {'solver ms':>10} {'search nodes':>13} {'search ms':>10}")
+    for _ in range(POSITIONS):
+        board, side = midgame_position(rng.randint(6, 24), rng)
+        if board.winner() is not None:
+            continue
+        solver = ThreatSolver(board, max_nodes=10 ** 6, time_limit_ms=None)
+        start = time.perf_counter()
+        found = solver.solve(side)
+        elapsed = time.perf_counter() - start
+        if found is None or not MIN_PLIES <= found[1] <= MAX_PROOF_PLIES:
+            continue
+        # The solver may start from a cell two away from every stone, so the search looks that far too
+        searcher = Searcher(board.copy(), found[1], None, TranspositionTable(64), distance=2, threats=False)
+        start = time.perf_counter()
+        move, score = searcher.search(side)
+        search_elapsed = time.perf_counter() - start
+        wins += 1
+        confirmed += score >= WIN_SCORE - found[1]
+        solver_nodes += solver.nodes
+        solver_ms += elapsed * 1000
+        search_nodes += searcher.nodes
+        search_ms += search_elapsed * 1000
+        print(f"{found[1]:>5} {solver.nodes:>13} {elapsed * 1000:>10.2f} {searcher.nodes:>13} {search_elapsed * 1000:>10.1f}")
+    if wins:
+        print(f"{wins} forced wins, {confirmed} confirmed by the full-width search")
+        print(f"total: solver {solver_nodes} nodes in {solver_ms:.1f} ms, search {search_nodes} nodes in {search_ms:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+# Pure-Python window scans against the NumPy evaluator, for static evaluation and root move ranking
+import random
+import timeit
+
+from engine import vector_eval
+from engine.bitboard import BitBoard
+from engine.candidates import candidate_tracker
+from engine.search import evaluate
+
+SIZES = (11, 19, 32)
+
+
+def filled_board(size, stones, rng): # Random stones, no care taken over wins since only scoring is timed
+    board = BitBoard(size)
+    cells = list(board.legal_moves())
+    rng.shuffle(cells)
+    for i, index in enumerate(cells[:stones]):
+        board.place(index, i % 2)
+    return board
+
+
+def per_call_us(function, number=300):
+    return timeit.timeit(function, number=number) / number * 1e6
+
+
+def main():
+    if not vector_eval.available:
+        print("NumPy is not installed, nothing to compare")
+        return
+    rng = random.Random(2023)
+    print(f"{'size':>4} {'eval py us':>11} {'eval np us':>11} {'rank py us':>11} {'rank np us':>11}")
+    for size in SIZES:
+        board = filled_board(size, size * size // 4, rng)
+        vector = vector_eval.vector_board(board)
+        candidates = candidate_tracker(board, 1)
+        moves = candidates.moves()
+        print(f"{size:>4} {per_call_us(lambda: evaluate(board, 0)):>11.1f} "
+              f"{per_call_us(lambda: vector.evaluate(board, 0)):>11.1f} "
+              f"{per_call_us(lambda: candidates.ranked(0)):>11.1f} "
+              f"{per_call_us(lambda: vector.rank(moves, 0)):>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+# Shared game engine used by the ASCII and Pygame front-ends
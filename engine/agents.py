@@ -0,0 +1,186 @@
+# Players the arena can pit against each other, built from specs like "alphabeta:ms=200,depth=8"
+
+import random
+import time
+
+from engine.bitboard import GridAdapter
+from engine.book import OpeningBook
+from engine.mcts import MonteCarloSearcher, ParallelMonteCarloSearcher
+from engine.rules import WIN_LENGTH
+from engine.search import MAX_DEPTH, Searcher
+from engine.tt import TranspositionTable
+
+
+class RandomAgent:
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.nodes = 0  # Positions looked at during the last move
+
+    def reset(self):
+        pass
+
+    def choose(self, board, side):
+        moves = list(board.legal_moves())
+        return self.rng.choice(moves) if moves else None
+
+
+class AlphaBetaAgent:
+    # The AI used by ascii.py and maingameai.py
+    def __init__(self, ms=1000, depth=MAX_DEPTH, table_mb=64, book=0, seed=None):
+        self.time_limit_ms = ms or None
+        self.depth = depth
+        self.tt = TranspositionTable(table_mb)
+        self.book = OpeningBook() if book else None  # book=1 plays the opening from engine/opening.book
+        self.nodes = 0
+
+    def reset(self):
+        self.tt.clear()
+
+    def choose(self, board, side):
+        searcher = Searcher(board, self.depth, self.time_limit_ms, self.tt, book=self.book)
+        move, score = searcher.search(side)
+        self.nodes = searcher.nodes
+        return move
+
+
+class MCTSAgent:
+    # Monte Carlo tree search, keeping its tree from move to move within a game
+    def __init__(self, ms=1000, workers=1, playouts=0, seed=None):
+        self.time_limit_ms = ms or None
+        self.workers = workers  # More than one grows a tree per process and adds up the visits
+        self.playouts = playouts or None
+        self.seed = seed
+        self.searcher = None
+        self.nodes = 0
+
+    def reset(self):
+        if self.searcher is not None and self.workers != 1:
+            self.searcher.shutdown()
+        self.searcher = None
+
+    def choose(self, board, side):
+        if self.searcher is None or self.searcher.board is not board:
+            if self.workers == 1:
+                self.searcher = MonteCarloSearcher(board, self.time_limit_ms, self.playouts, seed=self.seed)
+            else:
+                self.searcher = ParallelMonteCarloSearcher(board, self.time_limit_ms, self.workers or None, self.playouts, self.seed or 0)
+        move, score = self.searcher.search(side)
+        self.nodes = self.searcher.nodes
+        return move
+
+    def stats(self): # Extra per-move numbers for the arena report
+        if self.workers != 1:
+            return {'playouts': self.nodes}
+        return self.searcher.stats()
+
+
+class HeuristicAgent:
+    # The original maingameai.py AI: win if possible, block a four, otherwise use evaluate_move()
+    def __init__(self, seed=None):
+        self.nodes = 0
+
+    def reset(self):
+        pass
+
+    def choose(self, board, side):
+        grid = GridAdapter(board, ('player', 'ai') if side else ('ai', 'player'))
+        size = board.size
+        self.nodes = 0
+
+        for symbol in ('ai', 'player'):  # Win first, then block the opponent's line
+            for move in list(board.legal_moves()):
+                self.nodes += 1
+                board.place(move, grid.sides[symbol])
+                won = board.has_won(grid.sides[symbol])
+                board.undo()
+                if won:
+                    return move
+
+        best_move = None
+        best_score = float('-inf')
+        for row in range(size):
+            for col in range(size):
+                if grid[row][col] is None:
+                    self.nodes += 1
+                    score = evaluate_move(grid, row, col, 'player', blocking=True, win_length=board.win_length)
+                    if score > best_score:
+                        best_move = board.index(row, col)
+                        best_score = score
+        return best_move
+
+
+def evaluate_move(grid, row, col, opponent, blocking=False, win_length=WIN_LENGTH): # Counts windows one longer than a line holding a line's worth of opponent tiles
+    size = len(grid)
+    span = win_length + 1  # Window length, five cells for four in a row
+    score = 0
+
+    # Check horizontal line
+    for c in range(col - win_length + 1, col + 1):
+        if c >= 0 and c + win_length < size:
+            tiles = [grid[row][c + i] for i in range(span)]
+            if tiles.count(opponent) == win_length and blocking:
+                if c - 1 >= 0 and grid[row][c - 1] is None:
+                    score += 10
+                elif c + span < size and grid[row][c + span] is None:
+                    score += 10
+
+    # Check vertical line
+    for r in range(row - win_length + 1, row + 1):
+        if r >= 0 and r + win_length < size:
+            tiles = [grid[r + i][col] for i in range(span)]
+            if tiles.count(opponent) == win_length and blocking:
+                if r - 1 >= 0 and grid[r - 1][col] is None:
+                    score += 10
+                elif r + span < size and grid[r + span][col] is None:
+                    score += 10
+
+    # Check diagonal line (top-left to bottom-right)
+    for i in range(span):
+        r = row - i
+        c = col - i
+        if r >= 0 and c >= 0 and r + win_length < size and c + win_length < size:
+            tiles = [grid[r + j][c + j] for j in range(span)]
+            if tiles.count(opponent) == win_length and blocking:
+                if r - 1 >= 0 and c - 1 >= 0 and grid[r - 1][c - 1] is None:
+                    score += 10
+                elif r + span < size and c + span < size and grid[r + span][c + span] is None:
+                    score += 10
+
+    # Check diagonal line (top-right to bottom-left)
+    for i in range(span):
+        r = row - i
+        c = col + i
+        if r >= 0 and c < size and r + win_length < size and c - win_length >= 0:
+            tiles = [grid[r + j][c - j] for j in range(span)]
+            if tiles.count(opponent) == win_length and blocking:
+                if r - 1 >= 0 and c + 1 < size and grid[r - 1][c + 1] is None:
+                    score += 10
+                elif r + span < size and c - span >= 0 and grid[r + span][c - span] is None:
+                    score += 10
+
+    return score
+
+
+AGENTS = {
+    'random': RandomAgent,
+    'heuristic': HeuristicAgent,
+    'alphabeta': AlphaBetaAgent,
+    'mcts': MCTSAgent,
+}
+
+
+def make_agent(spec, seed=None): # "name" or "name:key=value,key=value", values are ints
+    name, _, options = spec.partition(':')
+    if name not in AGENTS:
+        raise ValueError(f"unknown agent {name!r}, choose from {', '.join(sorted(AGENTS))}")
+    kwargs = {}
+    for option in filter(None, options.split(',')):
+        key, _, value = option.partition('=')
+        kwargs[key] = int(value)
+    return AGENTS[name](seed=seed, **kwargs)
+
+
+def timed_choice(agent, board, side): # The agent's move and how long it took, in seconds
+    start = time.perf_counter()
+    move = agent.choose(board, side)
+    return move, time.perf_counter() - start
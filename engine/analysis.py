@@ -0,0 +1,149 @@
+# The AI as a library: score a position, or a stream of positions over a process pool
+#
+# analyse() searches a copy of the board with its own transposition table, so it
+# leaves the caller's board alone. The default budget is a fixed depth with no time
+# limit, which gives the same answer on any machine; a budget in milliseconds
+# depends on how fast the machine is and how busy it is.
+# analyse_batch() sends positions to worker processes in chunks and yields each board
+# with its result in the order the positions came in, keeping only a few chunks in
+# flight so it can work through a corpus of any size.
+#
+# Analyse saved games with: python -m engine.analysis [records folders or .seg files] [--depth D] [--ms MS] [--workers N]
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from engine.bitboard import BitBoard
+from engine.records import RECORDS_DIR, read_records, replay
+from engine.search import Searcher
+from engine.symmetry import inverse
+from engine.tt import TranspositionTable
+
+Budget = namedtuple('Budget', 'depth ms table_mb', defaults=(4, None, 4))  # Search limits for one position, ms None for no time limit
+CHUNK_SIZE = 16  # Positions sent to a worker at a time
+CHUNKS_PER_WORKER = 2  # Chunks kept in flight per worker, so no worker waits while results are collected
+
+worker_table = None  # Transposition table of this worker process, cleared before each position
+
+
+def analyse(board, budget=Budget(), side=None, tt=None): # (best move, score, principal variation, stats) for the side to move
+    # The side to move defaults to the one whose turn it is when side 0 moved first
+    if side is None:
+        side = len(board.history) % 2
+    if tt is None:
+        tt = TranspositionTable(budget.table_mb)
+    else:
+        tt.clear()  # Nothing carries over from other positions
+    position = board.copy()  # The search attaches its trackers to this copy, not to the caller's board
+    searcher = Searcher(position, budget.depth, budget.ms or None, tt)
+    if not budget.ms:
+        searcher.threats.time_limit_ms = None  # Only its node limit, so the result does not depend on the clock
+    start = time.perf_counter()
+    move, score = searcher.search(side)
+    elapsed = time.perf_counter() - start
+    stats = {
+        'nodes': searcher.nodes,
+        'cutoffs': searcher.cutoffs,
+        'depth': searcher.depth_reached,
+        'timed_out': searcher.timed_out,
+        'ms': elapsed * 1000,
+        'tt_hit_rate': tt.stats()['hit_rate'],
+    }
+    pv = principal_variation(searcher, move, side)
+    return move, score, pv, stats
+
+
+def principal_variation(searcher, move, side): # The best move followed by the best replies stored in the table
+    if move is None:
+        return []
+    board = searcher.board
+    pv = [move]
+    board.place(move, side)
+    while len(pv) < max(1, searcher.depth_reached) and board.winner() is None:
+        side = 1 - side
+        key, t = searcher.table_key(side)
+        entry = searcher.tt.probe(key)
+        if entry is None or entry[4] is None:
+            break
+        reply = searcher.maps[inverse(t)][entry[4]]
+        if reply < 0 or not board.is_empty(reply):
+            break  # Stored by a colliding position
+        pv.append(reply)
+        board.place(reply, side)
+    for _ in pv:
+        board.undo()
+    return pv
+
+
+def init_worker(table_mb): # Runs once in each worker process
+    global worker_table
+    worker_table = TranspositionTable(table_mb)
+
+
+def analyse_chunk(chunk, budget): # Runs in a worker: analyse a list of (size, win_length, history, stones)
+    results = []
+    for size, win_length, history, stones in chunk:
+        board = BitBoard(size, win_length)
+        board.sync(history, stones)
+        results.append(analyse(board, budget, tt=worker_table))
+    return results
+
+
+def pack(board): # What a worker needs to rebuild a board
+    return board.size, board.win_length, list(board.history), list(board.stones)
+
+
+def analyse_batch(boards, budget=Budget(), workers=None, chunk_size=CHUNK_SIZE): # Yields (board, analyse() of it) for each board, in order
+    workers = workers or os.cpu_count() or 1
+    boards = iter(boards)
+    if workers == 1:
+        tt = TranspositionTable(budget.table_mb)
+        for board in boards:
+            yield board, analyse(board, budget, tt=tt)
+        return
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(budget.table_mb,)) as pool:
+        pending = deque()  # (boards, future of their results) of each chunk in flight
+        while True:
+            while len(pending) < workers * CHUNKS_PER_WORKER:
+                chunk = list(itertools.islice(boards, chunk_size))
+                if not chunk:
+                    break
+                pending.append((chunk, pool.submit(analyse_chunk, [pack(board) for board in chunk], budget)))
+            if not pending:
+                return
+            chunk, future = pending.popleft()
+            yield from zip(chunk, future.result())
+
+
+def positions_from_records(records, every=1): # A board after every `every` moves of each saved game, copied so they can be kept
+    for record in records:
+        for board, side, index in replay(record):
+            if len(board.history) % every == 0 and board.winner() is None and not board.is_full():
+                yield board.copy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score positions from saved games with the AI")
+    parser.add_argument('paths', nargs='*', default=[RECORDS_DIR], help="records folders or .seg files")
+    parser.add_argument('--ms', type=int, default=Budget().ms, help="search time per position, in milliseconds (default no limit)")
+    parser.add_argument('--depth', type=int, default=Budget().depth, help="deepest search per position, in plies")
+    parser.add_argument('--table-mb', type=int, default=Budget().table_mb, help="transposition table of each worker, in megabytes")
+    parser.add_argument('--workers', type=int, default=0, help="worker processes, 0 for one per CPU")
+    parser.add_argument('--every', type=int, default=1, help="analyse the position after every N moves")
+    args = parser.parse_args()
+    budget = Budget(args.depth, args.ms, args.table_mb)
+    boards = positions_from_records(read_records(args.paths), args.every)
+    for board, (move, score, pv, stats) in analyse_batch(boards, budget, args.workers or None):
+        line = {'moves': [board.cell(index) for index in board.history], 'move': None if move is None else board.cell(move),
+                'score': score, 'pv': [board.cell(index) for index in pv], **stats}
+        sys.stdout.write(json.dumps(line) + '\n')
+
+
+if __name__ == '__main__':
+    main()
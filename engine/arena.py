@@ -0,0 +1,123 @@
+# Headless matches between two agents, reported as JSON
+# Usage: python -m engine.arena alphabeta:ms=100 heuristic --games 20 --workers 4
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import agents
+from engine.agents import make_agent, timed_choice
+from engine.bitboard import BitBoard
+from engine.profiling import add_profile_arguments, profiler_from_args
+from engine.rules import GRID_SIZE, WIN_LENGTH, Rules, add_rules_arguments, rules_from_args
+
+
+def play_game(players, first=0, size=GRID_SIZE, win_length=WIN_LENGTH): # Play one game, players[first] moves first
+    board = BitBoard(size, win_length)
+    for agent in players:
+        agent.reset()
+    latencies = ([], [])  # Seconds per move for each agent
+    nodes = [0, 0]
+    extra = ({}, {})  # Totals of whatever agent.stats() reports, per agent
+    winner = None
+    player = first
+    while not board.is_full():
+        side = 0 if player == first else 1  # The first player always plays side 0
+        move, seconds = timed_choice(players[player], board, side)
+        latencies[player].append(seconds)
+        nodes[player] += players[player].nodes
+        if hasattr(players[player], 'stats'):
+            for key, value in players[player].stats().items():
+                extra[player][key] = extra[player].get(key, 0) + value
+        board.place(move, side)
+        if board.has_won(side):
+            winner = player
+            break
+        player = 1 - player
+    for agent in players:
+        agent.reset()  # Let go of search trees and worker processes
+    return {'winner': winner, 'moves': list(board.history), 'first': first, 'latencies': latencies, 'nodes': nodes, 'extra': extra}
+
+
+def _play(task): # Runs in a pool worker: build the agents there and play one game
+    specs, first, seed, size, win_length = task
+    players = [make_agent(spec, seed * 2 + i) for i, spec in enumerate(specs)]
+    return play_game(players, first, size, win_length)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarise(specs, games):
+    report = {'games': len(games), 'draws': sum(game['winner'] is None for game in games), 'agents': []}
+    for player, spec in enumerate(specs):
+        latencies = [seconds for game in games for seconds in game['latencies'][player]]
+        thinking = sum(latencies)
+        nodes = sum(game['nodes'][player] for game in games)
+        extra = {}
+        for game in games:
+            for key, value in game['extra'][player].items():
+                extra[key] = extra.get(key, 0) + value
+        report['agents'].append({
+            'agent': spec,
+            'wins': sum(game['winner'] == player for game in games),
+            'win_rate': sum(game['winner'] == player for game in games) / len(games) if games else 0.0,
+            'moves': len(latencies),
+            'moves_per_second': len(latencies) / thinking if thinking else 0.0,
+            'nodes_per_second': nodes / thinking if thinking else 0.0,
+            'latency_p50_ms': percentile(latencies, 0.50) * 1000,
+            'latency_p99_ms': percentile(latencies, 0.99) * 1000,
+        })
+        if 'playouts' in extra:
+            report['agents'][-1]['playouts_per_second'] = extra['playouts'] / thinking if thinking else 0.0
+        if extra.get('tree_nodes'):
+            report['agents'][-1]['bytes_per_tree_node'] = extra['tree_bytes'] / extra['tree_nodes']
+    return report
+
+
+def run(specs, games, workers=None, seed=0, rules=None): # Play `games` games, swapping who goes first each game
+    rules = rules or Rules()
+    tasks = [(tuple(specs), game % 2, seed + game, rules.size, rules.win_length) for game in range(games)]
+    if workers == 1:
+        results = [_play(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_play, tasks))
+    return summarise(specs, results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless games between two AI agents")
+    parser.add_argument('agents', nargs=2, help="agent specs, e.g. alphabeta:ms=200,depth=8 heuristic random")
+    parser.add_argument('--games', type=int, default=10, help="number of games to play")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="processes to play games in")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the random agents")
+    parser.add_argument('--out', help="also write the JSON report to this file")
+    add_rules_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    profiler = profiler_from_args(args)
+    if profiler is not None:
+        args.workers = 1  # Worker processes would not report back, so play every game here
+        profiler.instrument(agents, ('evaluate_move',))
+        profiler.instrument_engine()
+    report = run(args.agents, args.games, args.workers, args.seed, rules_from_args(parser, args))
+    if profiler is not None:
+        print(profiler.report(), file=sys.stderr)  # Keeps stdout to the JSON report
+        print(f"Profile written to {profiler.dump()}", file=sys.stderr)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, 'w') as report_file:
+            report_file.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+# Compact board: one Python int per side, one bit per cell
+#
+# Cells are numbered row * stride + col, where stride is GRID_SIZE + 1. The extra
+# column is never set, so a run shifted past the right edge lands on an empty bit
+# instead of wrapping onto the next row.
+
+from engine.rules import GRID_SIZE, WIN_LENGTH
+from engine.zobrist import zobrist_keys
+
+
+def run_mask(stones, shift, length): # Bits that start a run of `length` stones along `shift`
+    run = stones
+    covered = 1
+    while covered * 2 <= length:
+        run &= run >> (covered * shift)
+        covered *= 2
+    if covered < length:
+        run &= run >> ((length - covered) * shift)
+    return run
+
+
+class BitBoard:
+    def __init__(self, size=GRID_SIZE, win_length=WIN_LENGTH):
+        self.size = size
+        self.win_length = win_length
+        self.stride = size + 1  # One padding column per row
+        self.shifts = (1, self.stride, self.stride + 1, self.stride - 1)  # Horizontal, vertical, diagonal, anti-diagonal
+        row_mask = (1 << size) - 1
+        self.full_mask = 0
+        for row in range(size):
+            self.full_mask |= row_mask << (row * self.stride)
+        self.keys = zobrist_keys(size * self.stride)
+        self.watchers = []  # Incremental trackers told about every placed and removed stone
+        self.reset()
+
+    def reset(self):
+        self.stones = [0, 0]  # Bitboard for side 0 and side 1
+        self.history = []  # Cell indexes in the order they were played
+        self.hash = 0  # Zobrist hash of the stones on the board
+        for watcher in self.watchers:
+            watcher.reset()
+
+    def copy(self): # Same stones and history, without the watchers
+        board = BitBoard(self.size, self.win_length)
+        board.stones = list(self.stones)
+        board.history = list(self.history)
+        board.hash = self.hash
+        return board
+
+    def sync(self, history, stones): # Catch up with another board's history and stones, undoing only where they differ
+        common = 0
+        while (common < len(self.history) and common < len(history) and self.history[common] == history[common]
+               and self.side_at(history[common]) == (0 if stones[0] >> history[common] & 1 else 1)):
+            common += 1
+        while len(self.history) > common:
+            self.undo()
+        for index in history[common:]:
+            self.place(index, 0 if stones[0] >> index & 1 else 1)
+
+    def index(self, row, col):
+        return row * self.stride + col
+
+    def cell(self, index):
+        return divmod(index, self.stride)
+
+    def on_board(self, row, col):
+        return 0 <= row < self.size and 0 <= col < self.size
+
+    def side_at(self, index): # Side owning the cell, or None if it is empty
+        bit = 1 << index
+        if self.stones[0] & bit:
+            return 0
+        if self.stones[1] & bit:
+            return 1
+        return None
+
+    def is_empty(self, index):
+        return not (self.stones[0] | self.stones[1]) >> index & 1
+
+    def empty_mask(self):
+        return self.full_mask & ~(self.stones[0] | self.stones[1])
+
+    def legal_moves(self): # Empty cells, lowest index first
+        empty = self.empty_mask()
+        while empty:
+            low = empty & -empty
+            yield low.bit_length() - 1
+            empty ^= low
+
+    def is_full(self):
+        return not self.empty_mask()
+
+    def place(self, index, side):
+        self.stones[side] |= 1 << index
+        self.history.append(index)
+        self.hash ^= self.keys[side][index]
+        for watcher in self.watchers:
+            watcher.placed(index, side)
+
+    def undo(self): # Take back the last placed stone
+        index = self.history.pop()
+        self._clear(index)
+        return index
+
+    def remove(self, index): # Take back a stone that may not be the last one played
+        if self.history and self.history[-1] == index:
+            return self.undo()
+        self.history.remove(index)
+        self._clear(index)
+        return index
+
+    def _clear(self, index):
+        bit = 1 << index
+        side = 0 if self.stones[0] & bit else 1
+        self.stones[side] &= ~bit
+        self.hash ^= self.keys[side][index]
+        for watcher in self.watchers:
+            watcher.removed(index, side)
+
+    def position_key(self, side): # Hash of the stones plus the side to move
+        return self.hash ^ self.keys[2] if side else self.hash
+
+    def has_won(self, side):
+        stones = self.stones[side]
+        for shift in self.shifts:
+            if run_mask(stones, shift, self.win_length):
+                return True
+        return False
+
+    def winner(self): # Side with a completed line, or None
+        for side in (0, 1):
+            if self.has_won(side):
+                return side
+        return None
+
+
+class _RowView:
+    def __init__(self, adapter, row):
+        self.adapter = adapter
+        self.row = row
+
+    def __len__(self):
+        return self.adapter.board.size
+
+    def __getitem__(self, col):
+        return self.adapter.get(self.row, col)
+
+    def __setitem__(self, col, value):
+        self.adapter.set(self.row, col, value)
+
+
+class GridAdapter:
+    # Lets the existing front-ends keep writing grid[row][col] = symbol on top of a BitBoard
+    def __init__(self, board, symbols, empty=None):
+        self.board = board
+        self.symbols = tuple(symbols)  # Symbol used by the front-end for side 0 and side 1
+        self.empty = empty
+        self.sides = {symbol: side for side, symbol in enumerate(self.symbols)}
+        self.rows = [_RowView(self, row) for row in range(board.size)]
+
+    def __len__(self):
+        return self.board.size
+
+    def __getitem__(self, row):
+        if not 0 <= row < self.board.size:
+            raise IndexError(row)
+        return self.rows[row]
+
+    def _index(self, row, col):
+        if not self.board.on_board(row, col):
+            raise IndexError((row, col))
+        return self.board.index(row, col)
+
+    def get(self, row, col):
+        side = self.board.side_at(self._index(row, col))
+        return self.empty if side is None else self.symbols[side]
+
+    def set(self, row, col, value):
+        index = self._index(row, col)
+        if not self.board.is_empty(index):
+            self.board.remove(index)
+        if value != self.empty:
+            self.board.place(index, self.sides[value])
+
+    def winner(self): # Symbol of the winning side, or None
+        side = self.board.winner()
+        return None if side is None else self.symbols[side]
+
+    def winner_at(self, row, col): # Symbol of the owner of (row, col) if they have a line, or None
+        side = self.board.side_at(self._index(row, col))
+        if side is not None and self.board.has_won(side):
+            return self.symbols[side]
+        return None
+
+    def reset(self):
+        self.board.reset()
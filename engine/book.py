@@ -0,0 +1,163 @@
+# Opening book: best moves for the first few stones, searched offline and looked up in microseconds
+#
+# Positions are stored once per symmetry class under their canonical key
+# (engine.symmetry), with the move in the canonical orientation. The file is a
+# header followed by records sorted by key, so the game can memory-map it and
+# binary search it without reading it in.
+#
+# Build it with: python -m engine.book [--stones N] [--ms MS] [--workers N] [--out PATH]
+
+import argparse
+import mmap
+import os
+import struct
+import time
+
+from engine import parallel
+from engine.bitboard import BitBoard
+from engine.rules import GRID_SIZE, WIN_LENGTH
+from engine.search import MAX_DEPTH, Searcher
+from engine.symmetry import canonical_key, cell_maps, inverse
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opening.book')  # Book shipped with the game
+MAGIC = b'4BK1'
+HEADER = struct.Struct('<4sHHHI')  # Magic, board size, win length, most stones covered, record count
+RECORD = struct.Struct('<QHi')  # Canonical position key, canonical move, score for the side to move
+BOOK_STONES = 3  # Positions with up to this many stones go in the book
+BOOK_MS = 2000  # Search time for each book position (milliseconds)
+
+
+class OpeningBook:
+    def __init__(self, path=BOOK_PATH):
+        self.path = path
+        self.data = None  # Memory map of the file, None if there is no usable book
+        self.size = self.win_length = self.stones = self.count = 0
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(path, 'rb') as book_file:
+                data = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return  # Missing or empty file: every probe misses
+        if len(data) < HEADER.size:
+            data.close()
+            return
+        magic, size, win_length, stones, count = HEADER.unpack_from(data)
+        if magic != MAGIC or len(data) != HEADER.size + count * RECORD.size:
+            data.close()
+            return
+        self.data = data
+        self.size, self.win_length, self.stones, self.count = size, win_length, stones, count
+
+    def covers(self, board): # Could the book hold this position at all
+        return (self.data is not None and board.size == self.size and board.win_length == self.win_length
+                and len(board.history) <= self.stones)
+
+    def find(self, key): # Record for a canonical key, or None
+        low, high = 0, self.count
+        while low < high:  # Binary search over the sorted records
+            middle = (low + high) // 2
+            record = RECORD.unpack_from(self.data, HEADER.size + middle * RECORD.size)
+            if record[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count:
+            record = RECORD.unpack_from(self.data, HEADER.size + low * RECORD.size)
+            if record[0] == key:
+                return record
+        return None
+
+    def probe(self, board, side): # (move, score) for the side to move, or None if the book has no answer
+        if not self.covers(board):
+            return None
+        key, t = canonical_key(board, side)
+        record = self.find(key)
+        if record is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return cell_maps(board)[inverse(t)][record[1]], record[2]  # Back to the real orientation
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+
+
+def search_position(size, win_length, history, stones, side, ms, depth): # Runs in a worker process
+    board = BitBoard(size, win_length)
+    for index in history:
+        board.place(index, 0 if stones[0] >> index & 1 else 1)
+    searcher = Searcher(board, depth, ms, parallel.worker_table(size, win_length))
+    return searcher.search(side)
+
+
+def build(path, size=GRID_SIZE, win_length=WIN_LENGTH, stones=BOOK_STONES, ms=BOOK_MS, depth=MAX_DEPTH, workers=None):
+    # The book side plays its book move and the other side may answer anywhere, for
+    # both the side that moves first and the side that moves second
+    board = BitBoard(size, win_length)
+    cells = list(board.legal_moves())
+    entries = {}  # Canonical key -> (canonical move, score)
+    level = [(board, 0)]  # Positions to search, all with the same number of stones
+    for index in cells:  # The book side moving second, after any first stone
+        first = board.copy()
+        first.place(index, 0)
+        level.append((first, 1))
+    pool = parallel.worker_pool(workers or os.cpu_count() or 1)
+    try:
+        while level:
+            unique = {}
+            for position, side in level:
+                key, t = canonical_key(position, side)
+                if key not in entries and key not in unique:
+                    unique[key] = (position, side, t)
+            print(f"{len(unique)} positions to search", flush=True)
+            futures = {key: pool.submit(search_position, size, win_length, position.history, position.stones, side, ms, depth)
+                       for key, (position, side, t) in unique.items()}
+            level = []
+            for key, (position, side, t) in unique.items():
+                move, score = futures[key].result()
+                if move is None:
+                    continue
+                entries[key] = (cell_maps(position)[t][move], score)
+                position = position.copy()
+                position.place(move, side)
+                if len(position.history) + 1 > stones or position.has_won(side):
+                    continue
+                for reply in position.legal_moves():  # Any answer from the other side
+                    child = position.copy()
+                    child.place(reply, 1 - side)
+                    if not child.has_won(1 - side):
+                        level.append((child, side))
+    finally:
+        pool.shutdown()
+    save(path, size, win_length, stones, entries)
+    return len(entries)
+
+
+def save(path, size, win_length, stones, entries):
+    with open(path, 'wb') as book_file:
+        book_file.write(HEADER.pack(MAGIC, size, win_length, stones, len(entries)))
+        for key in sorted(entries):
+            move, score = entries[key]
+            book_file.write(RECORD.pack(key, move, score))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the opening book")
+    parser.add_argument('--stones', type=int, default=BOOK_STONES, help="book positions with up to this many stones")
+    parser.add_argument('--ms', type=int, default=BOOK_MS, help="search time per position, in milliseconds")
+    parser.add_argument('--depth', type=int, default=MAX_DEPTH, help="deepest search per position, in plies")
+    parser.add_argument('--workers', type=int, default=0, help="worker processes, 0 for one per CPU")
+    parser.add_argument('--size', type=int, default=GRID_SIZE, help="board size")
+    parser.add_argument('--win-length', type=int, default=WIN_LENGTH, help="stones in a row needed to win")
+    parser.add_argument('--out', default=BOOK_PATH, help="book file to write")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    count = build(args.out, args.size, args.win_length, args.stones, args.ms, args.depth, args.workers or None)
+    print(f"{count} positions written to {args.out} in {time.perf_counter() - start:.0f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# Candidate moves: empty cells within a few rows and columns of a stone, kept up to date as stones come and go
+
+from engine.geometry import geometry
+from engine.windows import window_counters
+
+CANDIDATE_DISTANCE = 1  # How far from the nearest stone a move may be
+
+
+class CandidateTracker:
+    def __init__(self, board, distance=CANDIDATE_DISTANCE):
+        self.board = board
+        self.distance = distance
+        self.geometry = geometry(board)
+        self.near = self.geometry.neighbourhood(board, distance)
+        self.counters = window_counters(board)  # Per-window stone counts used to rank the moves
+        self.reset()
+        board.watchers.append(self)  # The board calls placed(), removed() and reset() on us
+
+    def reset(self):
+        self.counts = [0] * self.geometry.cells  # Stones within range of each cell
+        self.mask = 0  # Cells with at least one stone in range
+        for index in self.board.history:
+            self.placed(index, None)
+
+    def placed(self, index, side):
+        counts = self.counts
+        for cell in self.near[index]:
+            if not counts[cell]:
+                self.mask |= 1 << cell
+            counts[cell] += 1
+
+    def removed(self, index, side):
+        counts = self.counts
+        for cell in self.near[index]:
+            counts[cell] -= 1
+            if not counts[cell]:
+                self.mask &= ~(1 << cell)
+
+    def moves(self): # Empty candidate cells, or the centre on an empty board
+        if not self.board.history:
+            return [self.geometry.centre]
+        free = self.mask & self.board.empty_mask()
+        moves = []
+        while free:
+            low = free & -free
+            moves.append(low.bit_length() - 1)
+            free ^= low
+        return moves
+
+    def ranked(self, side): # Candidates for `side`, biggest threat first, then closest to the centre
+        moves = self.moves()
+        centre_distance = self.geometry.centre_distance
+        threat_score = self.counters.threat_score
+        moves.sort(key=lambda index: (-threat_score(index, side), centre_distance[index]))
+        return moves
+
+
+def candidate_tracker(board, distance=CANDIDATE_DISTANCE): # The board's tracker for `distance`, created on first use
+    for watcher in board.watchers:
+        if isinstance(watcher, CandidateTracker) and watcher.distance == distance:
+            return watcher
+    return CandidateTracker(board, distance)
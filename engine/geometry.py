@@ -0,0 +1,57 @@
+# Tables that only depend on the board size and win length, built once per board shape
+
+_geometry_cache = {}
+
+
+class Geometry:
+    def __init__(self, board):
+        size, stride, length = board.size, board.stride, board.win_length
+        self.cells = size * stride  # Number of bit positions, padding column included
+        self.windows = []  # Mask of every run of win_length cells on the board, indexed by window id
+        self.window_cells = []  # Cell indexes of each window
+        self.cell_windows = [[] for _ in range(self.cells)]  # Masks of the windows that contain each cell
+        self.cell_window_ids = [[] for _ in range(self.cells)]  # Ids of the windows that contain each cell
+        for row in range(size):
+            for col in range(size):
+                for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_row = row + d_row * (length - 1)
+                    end_col = col + d_col * (length - 1)
+                    if 0 <= end_row < size and 0 <= end_col < size:
+                        cells = [(row + d_row * i) * stride + col + d_col * i for i in range(length)]
+                        mask = 0
+                        for index in cells:
+                            mask |= 1 << index
+                        for index in cells:
+                            self.cell_windows[index].append(mask)
+                            self.cell_window_ids[index].append(len(self.windows))
+                        self.windows.append(mask)
+                        self.window_cells.append(cells)
+        # Weight of a window holding n stones of one side and none of the other
+        self.weights = [0] + [10 ** (n - 1) for n in range(1, length + 1)]
+        centre = (size - 1) / 2
+        self.centre_distance = [size] * self.cells  # Padding cells sort last
+        for row in range(size):
+            for col in range(size):
+                self.centre_distance[row * stride + col] = max(abs(row - centre), abs(col - centre))
+        self.centre = board.index(size // 2, size // 2)
+        self.neighbour_shifts = (1, stride - 1, stride, stride + 1)
+        self._neighbourhoods = {}
+
+    def neighbourhood(self, board, distance): # Per cell, the on-board cells within `distance` rows and columns
+        if distance not in self._neighbourhoods:
+            near = [[] for _ in range(self.cells)]
+            for row in range(board.size):
+                for col in range(board.size):
+                    for d_row in range(-distance, distance + 1):
+                        for d_col in range(-distance, distance + 1):
+                            if (d_row or d_col) and board.on_board(row + d_row, col + d_col):
+                                near[board.index(row, col)].append(board.index(row + d_row, col + d_col))
+            self._neighbourhoods[distance] = near
+        return self._neighbourhoods[distance]
+
+
+def geometry(board):
+    key = (board.size, board.win_length)
+    if key not in _geometry_cache:
+        _geometry_cache[key] = Geometry(board)
+    return _geometry_cache[key]
@@ -0,0 +1,267 @@
+# Monte Carlo tree search (UCT) with random playouts on the bitboard
+#
+# Each iteration walks down the tree picking the child with the best upper
+# confidence bound, adds one new child, plays random moves near the stones until
+# someone completes a line, and counts the result back up the path. The tree is
+# kept between moves: when the next search starts from a position further down
+# the same game, the matching subtree becomes the new root.
+
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import CancelledError
+
+from engine import parallel
+from engine.bitboard import BitBoard
+from engine.candidates import CANDIDATE_DISTANCE, candidate_tracker
+from engine.geometry import geometry
+from engine.threats import ThreatSolver
+from engine.windows import window_counters
+
+EXPLORATION = 1.4  # Weight of the exploration term in the upper confidence bound
+DRAW = 2  # Node.winner for a full board
+SCORE_SCALE = 1000  # Search score of a certain win, a coin flip scores 0
+MCTS_PLAYOUTS = 20000  # Playouts per move when there is no time limit
+
+
+class Node:
+    __slots__ = ('move', 'parent', 'side', 'children', 'untried', 'visits', 'wins', 'winner')
+
+    def __init__(self, move, parent, side):
+        self.move = move
+        self.parent = parent
+        self.side = side  # Side that played `move`, whose point of view `wins` is counted from
+        self.children = []
+        self.untried = None  # Moves not expanded yet, most promising last
+        self.visits = 0
+        self.wins = 0.0  # Playouts won by `side`, draws count a half
+        self.winner = None  # Side that won by playing `move`, DRAW, or None if the game goes on
+
+
+def tree_size(root): # Nodes in the tree and an estimate of their memory in bytes
+    count = size = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        size += sys.getsizeof(node) + sys.getsizeof(node.children)
+        if node.untried is not None:
+            size += sys.getsizeof(node.untried)
+        stack.extend(node.children)
+    return count, size
+
+
+class MonteCarloSearcher:
+    def __init__(self, board, time_limit_ms=1000, playouts=None, exploration=EXPLORATION, seed=None, distance=CANDIDATE_DISTANCE, threats=True):
+        self.board = board
+        self.candidates = candidate_tracker(board, distance)  # Moves near the stones, ranked by threat
+        self.counters = window_counters(board)  # Finished lines and the per-window counts playouts start from
+        geo = geometry(board)
+        self.near = geo.neighbourhood(board, distance)
+        self.cell_windows = geo.cell_window_ids
+        self.time_limit_ms = time_limit_ms  # Budget per move, None to stop only at `playouts`
+        self.max_playouts = playouts  # Optional cap on playouts per move
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.threats = ThreatSolver(board) if threats else None  # Looks for a forced win by threats before the playouts
+        self.root = None  # Tree from the last search, and the game it was built for
+        self.root_history = []
+        self.nodes = 0  # Playouts in the last search
+        self.reused = 0  # Visits the root already had from earlier searches
+        self.stopped = False  # Set by stop(), cleared by whoever starts the next search
+        self.stop_event = None  # multiprocessing.Event that does the same for a search in a worker process
+
+    def stop(self): # Ask a running search to finish early
+        self.stopped = True
+
+    def reroot(self, side): # Keep the subtree for the current position if the last tree leads here
+        board = self.board
+        node = self.root
+        known = len(self.root_history)
+        if node is not None and board.history[:known] == self.root_history:
+            for move in board.history[known:]:
+                node = next((child for child in node.children if child.move == move), None)
+                if node is None:
+                    break
+        else:
+            node = None
+        if node is None or node.side != 1 - side:
+            node = Node(None, None, 1 - side)
+        node.parent = None  # Let the rest of the old tree go
+        self.root = node
+        self.root_history = list(board.history)
+        return node
+
+    def search(self, side): # Most visited move for `side` and its win rate as a score
+        self.nodes = 0
+        deadline = time.perf_counter() + self.time_limit_ms / 1000 if self.time_limit_ms else None
+        if self.threats is not None:
+            found = self.threats.solve(side, deadline)  # Comes out of the same budget as the playouts
+            if found is not None:
+                return found[0], SCORE_SCALE
+        root = self.reroot(side)
+        self.reused = root.visits
+        limit = self.max_playouts or (None if deadline else MCTS_PLAYOUTS)
+        while not self.stopped:
+            self.iterate(root)
+            self.nodes += 1
+            if limit is not None and self.nodes >= limit:
+                break
+            if self.nodes & 15 == 0 and (deadline is not None and time.perf_counter() > deadline
+                                         or self.stop_event is not None and self.stop_event.is_set()):
+                break
+        if not root.children:
+            return None, 0
+        best = max(root.children, key=lambda child: (child.visits, -child.move))
+        return best.move, round((best.wins / best.visits * 2 - 1) * SCORE_SCALE)
+
+    def visit_counts(self): # (visits, wins) of each root move, for combining several trees
+        return {child.move: (child.visits, child.wins) for child in self.root.children}
+
+    def iterate(self, root):
+        board = self.board
+        node = root
+        played = 0
+        log = math.log
+        while node.winner is None and not node.untried and node.children:  # Select
+            scale = self.exploration * math.sqrt(log(node.visits))
+            node = max(node.children, key=lambda child: child.wins / child.visits + scale / math.sqrt(child.visits))
+            board.place(node.move, node.side)
+            played += 1
+        if node.winner is None:
+            if node.untried is None:
+                node.untried = self.candidates.ranked(1 - node.side)[::-1]
+            if node.untried:  # Expand
+                side = 1 - node.side
+                child = Node(node.untried.pop(), node, side)
+                board.place(child.move, side)
+                played += 1
+                if self.counters.lines[side]:
+                    child.winner = side
+                node.children.append(child)
+                node = child
+            else:
+                node.winner = DRAW
+        result = node.winner if node.winner is not None else self.playout(1 - node.side)
+        for _ in range(played):
+            board.undo()
+        while node is not None:  # Back up the result
+            node.visits += 1
+            if result == node.side:
+                node.wins += 1
+            elif result == DRAW:
+                node.wins += 0.5
+            node = node.parent
+
+    def playout(self, side): # Random moves near the stones until a line is completed: the winner, or DRAW
+        board = self.board
+        counts = (list(self.counters.counts[0]), list(self.counters.counts[1]))
+        length = board.win_length
+        cell_windows, near = self.cell_windows, self.near
+        randrange = self.rng.randrange
+        taken = board.stones[0] | board.stones[1]
+        moves = self.candidates.moves()
+        listed = set(moves)
+        while moves:
+            pick = randrange(len(moves))
+            move = moves[pick]
+            moves[pick] = moves[-1]
+            moves.pop()
+            mine = counts[side]
+            for window in cell_windows[move]:
+                mine[window] += 1
+                if mine[window] == length:
+                    return side
+            taken |= 1 << move
+            for cell in near[move]:
+                if cell not in listed and not taken >> cell & 1:
+                    listed.add(cell)
+                    moves.append(cell)
+            side = 1 - side
+        return DRAW
+
+    def stats(self): # Playouts, tree nodes and memory after the last search
+        nodes, size = tree_size(self.root) if self.root is not None else (0, 0)
+        return {'playouts': self.nodes, 'tree_nodes': nodes, 'tree_bytes': size}
+
+
+worker_searchers = {}  # Seed -> tree kept by this worker process between moves
+
+
+def search_share(size, win_length, stones, history, side, time_limit_ms, playouts, seed): # Runs in a worker process
+    # One tree per seed: a process that is handed two shares of a search grows two trees, so no visits are counted twice
+    worker_searcher = worker_searchers.get(seed)
+    if worker_searcher is None or worker_searcher.board.size != size or worker_searcher.board.win_length != win_length:
+        worker_searcher = worker_searchers[seed] = MonteCarloSearcher(BitBoard(size, win_length), seed=seed, threats=False)
+        worker_searcher.stop_event = parallel.worker_stop
+    board = worker_searcher.board
+    board.sync(history, stones)
+    worker_searcher.time_limit_ms = time_limit_ms
+    worker_searcher.max_playouts = playouts
+    worker_searcher.search(side)
+    return worker_searcher.visit_counts(), worker_searcher.nodes
+
+
+class ParallelMonteCarloSearcher:
+    # Root parallel: every worker grows its own tree for the whole budget and the visit counts are added up
+    def __init__(self, board, time_limit_ms=1000, workers=None, playouts=None, seed=0):
+        self.board = board
+        self.time_limit_ms = time_limit_ms
+        self.workers = workers
+        self.max_playouts = playouts
+        self.seed = seed
+        self.executor = None
+        self.stop_event = None  # Shared with the workers, so stop() reaches searches already running
+        self.futures = []
+        self.threats = ThreatSolver(board)  # Looks for a forced win by threats before handing out the playouts
+        self.nodes = 0  # Playouts in the last search, all workers together
+        self.stopped = False  # Set by stop(), cleared when the next search starts
+
+    def stop(self): # Ask a running search to finish early with the playouts the workers have made so far
+        self.stopped = True
+        if self.stop_event is not None:
+            self.stop_event.set()
+        for future in self.futures:
+            future.cancel()
+
+    def search(self, side):
+        if self.executor is None:
+            self.workers = self.workers or os.cpu_count() or 1
+            self.stop_event = multiprocessing.Event()
+            self.executor = parallel.worker_pool(self.workers, 0, self.stop_event)  # No transposition tables in the workers
+        board = self.board
+        self.nodes = 0
+        self.stopped = False
+        self.stop_event.clear()
+        deadline = time.perf_counter() + self.time_limit_ms / 1000 if self.time_limit_ms else None
+        found = self.threats.solve(side, deadline)  # Comes out of the same budget as the playouts
+        if found is not None:
+            return found[0], SCORE_SCALE
+        self.futures = [self.executor.submit(search_share, board.size, board.win_length, list(board.stones), list(board.history),
+                                             side, parallel.remaining_ms(deadline), self.max_playouts, self.seed + worker) for worker in range(self.workers)]
+        if self.stopped:
+            self.stop_event.set()  # stop() came while the searches were being handed out
+        totals = {}
+        for future in self.futures:
+            try:
+                counts, playouts = future.result()
+            except CancelledError:
+                continue  # Stopped before this worker started
+            self.nodes += playouts
+            for move, (visits, wins) in counts.items():
+                seen = totals.get(move, (0, 0.0))
+                totals[move] = (seen[0] + visits, seen[1] + wins)
+        self.futures = []
+        if not totals:
+            return None, 0
+        move = max(totals, key=lambda move: (totals[move][0], -move))  # Most visits, ties to the lowest cell
+        visits, wins = totals[move]
+        return move, round((wins / visits * 2 - 1) * SCORE_SCALE)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
@@ -0,0 +1,168 @@
+# Root-parallel search: the root moves are dealt out to worker processes, and each
+# worker runs the normal iterative-deepening search over its share
+#
+# Separate processes cannot share one transposition table cheaply, so this splits
+# the root instead of running Lazy-SMP helpers, and every worker keeps its own table
+# from move to move. The shares are compared at the deepest depth all of them
+# finished, with ties going to the move ranked first, so a position searched to a
+# fixed depth always gives the same move whatever the number of workers.
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+
+from engine.bitboard import BitBoard
+from engine.candidates import CANDIDATE_DISTANCE, candidate_tracker
+from engine.search import MATE_RANGE, WIN_SCORE, INFINITY, Searcher
+from engine.threats import ThreatSolver
+from engine.tt import TranspositionTable
+
+WORKER_TABLES = 4  # Rule sets a worker keeps a transposition table for, the least recently used is dropped first
+
+worker_tables = {}  # (size, win_length) -> transposition table of this worker process, most recently used last
+worker_table_mb = 0  # Size of each of those tables, 0 for none
+worker_stop = None  # multiprocessing.Event the parent sets to end the searches running in this worker, if it gave one
+
+
+def init_worker(table_mb, stop=None):
+    global worker_table_mb, worker_stop
+    worker_table_mb = table_mb
+    worker_stop = stop
+
+
+def worker_table(size, win_length): # This worker's table for one rule set, or None if the pool has no tables
+    # Zobrist keys only depend on the number of cells, so boards of one size with different
+    # win lengths hash alike and must not share a table
+    if not worker_table_mb:
+        return None
+    key = (size, win_length)
+    table = worker_tables.pop(key, None)
+    if table is None:
+        if len(worker_tables) >= WORKER_TABLES:
+            del worker_tables[next(iter(worker_tables))]
+        table = TranspositionTable(worker_table_mb)
+    worker_tables[key] = table
+    return table
+
+
+def worker_pool(workers, table_mb=16, stop=None): # Process pool whose workers each hold a transposition table and share `stop`
+    return ProcessPoolExecutor(workers, initializer=init_worker, initargs=(table_mb, stop))
+
+
+def remaining_ms(deadline): # Budget left before a perf_counter deadline, at least 1 ms, or None for no limit
+    if deadline is None:
+        return None
+    return max(1, round((deadline - time.perf_counter()) * 1000))
+
+
+def search_share(size, win_length, stones, history, side, moves, depth, time_limit_ms, distance):
+    board = BitBoard(size, win_length)
+    for index in history:  # Replay the game so the watchers see the same board
+        board.place(index, 0 if stones[0] >> index & 1 else 1)
+    searcher = Searcher(board, depth, time_limit_ms, worker_table(size, win_length), distance, threats=False)  # The parent already tried the threat search
+    searcher.root = moves
+    searcher.stop_event = worker_stop
+    move, score = searcher.search(side)
+    return searcher.iterations, move, score, searcher.nodes
+
+
+def decisive(score):
+    return abs(score) > WIN_SCORE - MATE_RANGE
+
+
+def combine(order, results, max_depth): # Best (move, score) and the depth it was judged at
+    # A share covers every depth once it proves a win or loss or runs out of depths
+    reached = []
+    for iterations, move, score, nodes in results:
+        if iterations and (decisive(iterations[-1][2]) or iterations[-1][0] >= max_depth):
+            reached.append(max_depth)
+        else:
+            reached.append(iterations[-1][0] if iterations else 0)
+    depth = min(reached)
+    rank = {move: position for position, move in enumerate(order)}
+    best_move, best_score = None, -INFINITY
+    for iterations, move, score, nodes in results:
+        if iterations and decisive(iterations[-1][2]):
+            _, move, score = iterations[-1]
+        elif depth:
+            _, move, score = [iteration for iteration in iterations if iteration[0] <= depth][-1]
+        if move is None:
+            continue
+        if best_move is None or score > best_score or (score == best_score and rank[move] < rank[best_move]):
+            best_move, best_score = move, score
+    return best_move, best_score, depth
+
+
+class ParallelSearcher:
+    # Same interface as Searcher, with the root moves spread over a process pool
+    def __init__(self, board, depth=4, time_limit_ms=None, workers=None, table_mb=16, distance=CANDIDATE_DISTANCE, executor=None, book=None, stop_event=None):
+        self.board = board
+        self.candidates = candidate_tracker(board, distance)  # Ranks the root moves before they are dealt out
+        self.depth = depth
+        self.time_limit_ms = time_limit_ms
+        self.workers = workers or os.cpu_count() or 1  # One process per core by default
+        self.table_mb = table_mb  # Transposition table size of each worker
+        self.distance = distance
+        self.book = book  # Optional OpeningBook checked before searching
+        self.threats = ThreatSolver(board)  # Looks for a forced win by threats before handing out the moves
+        self.executor = executor  # Pool from worker_pool(), or None to start one on the first search
+        self.own_executor = executor is None  # Only shut down a pool we started
+        self.stop_event = stop_event  # The `stop` the pool was made with, so stop() reaches shares already running
+        self.futures = []
+        self.nodes = 0  # Positions visited by all the workers during the last search
+        self.depth_reached = 0  # Depth every share of the last search finished
+        self.timed_out = False
+
+    def start(self):
+        if self.executor is None:
+            self.stop_event = multiprocessing.Event()
+            self.executor = worker_pool(self.workers, self.table_mb, self.stop_event)
+
+    def stop(self): # Drop shares that have not started and end the running ones with what they have searched so far
+        if self.stop_event is not None:
+            self.stop_event.set()
+        for future in self.futures:
+            future.cancel()
+
+    def search(self, side): # Best move for `side` and its score, from side's point of view
+        board = self.board
+        self.nodes = 0
+        self.depth_reached = 0
+        self.timed_out = False
+        if self.book is not None:
+            found = self.book.probe(board, side)
+            if found is not None:
+                return found
+        deadline = time.perf_counter() + self.time_limit_ms / 1000 if self.time_limit_ms else None
+        found = self.threats.solve(side, deadline)  # Comes out of the same budget as the shares
+        if found is not None:
+            return found[0], WIN_SCORE - found[1]
+        moves = self.candidates.ranked(side)
+        if not moves:
+            return None, 0
+        self.start()
+        if self.stop_event is not None:
+            self.stop_event.clear()
+        shares = [moves[start::self.workers] for start in range(min(self.workers, len(moves)))]  # Dealt like cards so every share gets strong moves
+        self.futures = [self.executor.submit(search_share, board.size, board.win_length, list(board.stones), list(board.history),
+                                             side, share, self.depth, remaining_ms(deadline), self.distance) for share in shares]
+        results = []
+        for future in self.futures:
+            try:
+                results.append(future.result())
+            except CancelledError:
+                self.timed_out = True
+        self.futures = []
+        if not results:
+            return moves[0], 0  # Stopped before any share started
+        self.nodes = sum(result[3] for result in results)
+        max_depth = min(self.depth, board.empty_mask().bit_count())
+        move, score, self.depth_reached = combine(moves, results, max_depth)
+        self.timed_out = self.timed_out or self.depth_reached < max_depth and not decisive(score)
+        return move, score
+
+    def shutdown(self):
+        if self.executor is not None and self.own_executor:
+            self.executor.shutdown(wait=True)
+        self.executor = None
@@ -0,0 +1,159 @@
+# Opt-in timing of the game's hot functions, turned on with --profile or the FOUR_PROFILE environment variable
+#
+# Nothing is wrapped until a Profiler is started, so a normal game runs the plain
+# functions with no overhead. When it is on, each instrumented function counts its
+# calls and time, searches add up their nodes and cutoffs, and every thread that runs
+# Python code is also profiled with cProfile. At the end of a game the summary table
+# is printed and the cProfile data is written to a .prof file (open it with
+# `python -m pstats`, snakeviz, or speedscope after converting it).
+
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+
+from engine.candidates import CandidateTracker
+from engine.mcts import MonteCarloSearcher
+from engine.search import Searcher
+from engine.threats import ThreatSolver
+from engine.windows import WindowCounters
+
+PROFILE_ENV = 'FOUR_PROFILE'  # Set to 1 for the default file or to the path of the .prof file to write
+PROFILE_PATH = 'four.prof'  # Default output file, in the working directory
+
+
+class Snapshot:
+    # The stats of a profile so far; pstats.Stats(profile) would call create_stats() and switch the profile off
+    def __init__(self, profile):
+        profile.snapshot_stats()
+        self.stats = profile.stats
+
+    def create_stats(self):
+        pass
+
+
+class Profiler:
+    def __init__(self, path=PROFILE_PATH):
+        self.path = path
+        self.calls = {}  # Name -> [calls, seconds]
+        self.counters = {}  # Name -> running total, e.g. nodes searched
+        self.caches = {}  # Name -> object with hits and misses, read when the report is made
+        self.wrapped = []  # (owner, name, original) to put back on stop()
+        self.profiles = []  # cProfile.Profile of every thread seen
+        self.running = False
+
+    def start(self):
+        self.running = True
+        if sys.version_info < (3, 12):
+            threading.setprofile(self.thread_started)  # Threads started from now on get their own cProfile
+        self.profile_thread()  # From Python 3.12 one profile sees every thread
+
+    def thread_started(self, frame, event, arg): # First profile event of a new thread: hand the thread to cProfile
+        self.profile_thread()
+
+    def profile_thread(self):
+        profile = cProfile.Profile()
+        self.profiles.append(profile)
+        profile.enable()  # Replaces thread_started for this thread
+
+    def stop(self):
+        if sys.version_info < (3, 12):
+            threading.setprofile(None)
+        for profile in self.profiles:
+            profile.disable()  # Only stops the calling thread's profile, the others stop when their threads end
+        for owner, name, original in reversed(self.wrapped):
+            setattr(owner, name, original)
+        self.wrapped = []
+        self.running = False
+
+    def instrument(self, owner, names, tally=None): # Replace owner.name (a module or class attribute) with a timed version
+        for name in names:
+            original = getattr(owner, name)
+            label = f"{getattr(owner, '__name__', owner)}.{name}"
+            setattr(owner, name, self.timed(label, original, tally))
+            self.wrapped.append((owner, name, original))
+
+    def timed(self, label, function, tally=None):
+        entry = self.calls.setdefault(label, [0, 0.0])
+        clock = time.perf_counter
+
+        def timed_call(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                entry[0] += 1
+                entry[1] += clock() - start
+                if tally is not None:
+                    tally(self, args)
+
+        timed_call.__wrapped__ = function
+        return timed_call
+
+    def instrument_engine(self): # Time the searches and the evaluation and move ordering they spend their time in
+        self.instrument(Searcher, ('search',), search_tally)
+        self.instrument(MonteCarloSearcher, ('search',), search_tally)
+        self.instrument(ThreatSolver, ('solve',))
+        self.instrument(WindowCounters, ('evaluate',))
+        self.instrument(CandidateTracker, ('ranked',))
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def watch_cache(self, name, cache): # Report the hit rate of anything with hits and misses counts
+        self.caches[name] = cache
+
+    def report(self, extra=None): # Summary table, with any extra lines (such as frame times) after it
+        lines = [f"{'function':<40} {'calls':>9} {'total ms':>10} {'mean us':>9}"]
+        for label, (calls, seconds) in sorted(self.calls.items(), key=lambda item: -item[1][1]):
+            if not calls:
+                continue  # Instrumented but never used, such as the engine this game did not pick
+            mean = seconds / calls * 1e6 if calls else 0.0
+            lines.append(f"{label:<40} {calls:>9} {seconds * 1000:>10.1f} {mean:>9.1f}")
+        for name, value in self.counters.items():
+            lines.append(f"{name:<40} {value:>9}")
+        for name, cache in self.caches.items():
+            probes = cache.hits + cache.misses
+            rate = cache.hits / probes if probes else 0.0
+            lines.append(f"{name + ' hit rate':<40} {rate:>9.1%} ({cache.hits} of {probes})")
+        if extra:
+            lines.append(extra)
+        return '\n'.join(lines)
+
+    def dump(self): # Write the cProfile data of every thread to self.path, returns the path or None if nothing was recorded
+        stats = None
+        for profile in self.profiles:
+            snapshot = Snapshot(profile)
+            if not snapshot.stats:
+                continue
+            if stats is None:
+                stats = pstats.Stats(snapshot)
+            else:
+                stats.add(snapshot)
+        if stats is None:
+            return None
+        stats.dump_stats(self.path)
+        return self.path
+
+
+def search_tally(profiler, args): # After a search: add up what it did
+    searcher = args[0]
+    profiler.count('search nodes', searcher.nodes)
+    profiler.count('search cutoffs', getattr(searcher, 'cutoffs', 0))
+    if getattr(searcher, 'threats', None) is not None:
+        profiler.count('threat search nodes', searcher.threats.nodes)
+
+
+def add_profile_arguments(parser): # --profile [PATH], defaulting to the FOUR_PROFILE environment variable
+    parser.add_argument('--profile', nargs='?', const=PROFILE_PATH, default=os.environ.get(PROFILE_ENV) or None,
+                        help=f"time the game's hot functions and write cProfile data to PATH (default {PROFILE_PATH}), also set by {PROFILE_ENV}")
+
+
+def profiler_from_args(args): # A started Profiler, or None when profiling is off
+    if not args.profile:
+        return None
+    profiler = Profiler(PROFILE_PATH if args.profile == '1' else args.profile)
+    profiler.start()
+    return profiler
@@ -0,0 +1,205 @@
+# Finished games saved as compact move lists, and a streaming reader for mining them
+#
+# Games are appended to segment files (games-00000.seg, games-00001.seg, ...) in a
+# records folder. Each segment starts with a magic number and then holds records
+# back to back: a small header followed by the moves, one byte per cell index
+# (row * size + col) on boards of up to 16x16 and two bytes on bigger ones. The
+# reader memory-maps one segment at a time and yields records one by one, so it
+# can go through millions of games without loading them.
+#
+# Analyse saved games with: python -m engine.records [folder or .seg files] [--evals PATH]
+
+import argparse
+import json
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+from engine.bitboard import BitBoard
+from engine.symmetry import canonical_key
+from engine.windows import window_counters
+
+RECORDS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'records')  # Next to the engine folder
+MAGIC = b'4GR1'
+RECORD = struct.Struct('<BBBH')  # Board size, win length, result, number of moves
+SEGMENT_BYTES = 64 * 1024 * 1024  # A new segment is started once the current one reaches this size
+DRAW = 2  # Results 0 and 1 are the winning side
+UNFINISHED = 3  # The game was abandoned before anyone won
+RESULTS = {0: 'first', 1: 'second', DRAW: 'draw', UNFINISHED: 'unfinished'}
+OPENING_PLIES = 2  # Moves that make up an opening in the statistics
+TOP_OPENINGS = 10  # Openings listed in the report
+
+GameRecord = namedtuple('GameRecord', 'size win_length result moves')  # moves: cell indexes, row * size + col
+
+
+def cell_bytes(size): # Bytes used for each move on a board of this size
+    return 1 if size * size <= 256 else 2
+
+
+def result_of(board): # Winning side, DRAW or UNFINISHED
+    winner = board.winner()
+    if winner is not None:
+        return winner
+    return DRAW if board.is_full() else UNFINISHED
+
+
+def encode(board, result=None): # Record bytes for the game on the board
+    moves = [row * board.size + col for row, col in map(board.cell, board.history)]
+    if result is None:
+        result = result_of(board)
+    packed = bytes(moves) if cell_bytes(board.size) == 1 else struct.pack(f'<{len(moves)}H', *moves)
+    return RECORD.pack(board.size, board.win_length, result, len(moves)) + packed
+
+
+class RecordWriter:
+    # Appends games to the newest segment in a folder, starting a new one when it is full
+    def __init__(self, directory=RECORDS_DIR, segment_bytes=SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.file = None  # Opened on the first game, so a session with no games leaves no file
+
+    def append(self, board, result=None):
+        data = encode(board, result)
+        if self.file is None or self.file.tell() + len(data) > self.segment_bytes:
+            self.open_segment(len(data))
+        self.file.write(data)  # One write per game, so a crash loses at most the game being written
+        self.file.flush()
+
+    def open_segment(self, needed=0): # Newest segment if `needed` more bytes still fit in it, else a new one
+        if self.file is not None:
+            self.file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        paths = segment_paths(self.directory)
+        number = len(paths)
+        if paths and os.path.getsize(paths[-1]) + needed <= self.segment_bytes:
+            number -= 1  # Carry on with the newest segment
+        self.file = open(os.path.join(self.directory, f'games-{number:05d}.seg'), 'ab')
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def add_records_arguments(parser): # --records, for the clients that save their games
+    parser.add_argument('--records', default=RECORDS_DIR, help="folder finished games are saved to, '' to not save them")
+
+
+def writer_from_args(args): # RecordWriter for the folder on the command line, or None if saving is turned off
+    return RecordWriter(args.records) if args.records else None
+
+
+def segment_paths(directory): # Segment files in the order they were written
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    return [os.path.join(directory, name) for name in sorted(names) if name.startswith('games-') and name.endswith('.seg')]
+
+
+def read_segment(path): # Yields each GameRecord in one segment file
+    with open(path, 'rb') as segment:
+        try:
+            data = mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return  # Empty file
+    with data:
+        if data[:len(MAGIC)] != MAGIC:
+            return
+        offset = len(MAGIC)
+        end = len(data)
+        while offset + RECORD.size <= end:
+            size, win_length, result, count = RECORD.unpack_from(data, offset)
+            offset += RECORD.size
+            width = cell_bytes(size)
+            if offset + count * width > end:
+                return  # Cut short by a crash while it was written
+            if width == 1:
+                moves = data[offset:offset + count]
+            else:
+                moves = struct.unpack_from(f'<{count}H', data, offset)
+            offset += count * width
+            yield GameRecord(size, win_length, result, moves)
+
+
+def read_records(paths=(RECORDS_DIR,)): # Yields every GameRecord in the given folders and segment files
+    for path in paths:
+        for segment in (segment_paths(path) if os.path.isdir(path) else [path]):
+            yield from read_segment(segment)
+
+
+def replay(record, board=None): # Yields (board, side, index) after each move, the same board every time
+    if board is None:
+        board = BitBoard(record.size, record.win_length)
+    for ply, cell in enumerate(record.moves):
+        index = board.index(*divmod(cell, record.size))
+        board.place(index, ply % 2)
+        yield board, ply % 2, index
+
+
+def analyse(records, evals=None, opening_plies=OPENING_PLIES, top=TOP_OPENINGS):
+    # Replays every record to recompute its result, counts openings by symmetry class, and
+    # if `evals` is a file writes one JSON line per game with the static evaluation after each move
+    report = {'games': 0, 'moves': 0, 'results': dict.fromkeys(RESULTS.values(), 0), 'mismatched_results': 0}
+    openings = {}  # (rules, canonical key) -> [rules, moves as first seen, games, first player wins, second player wins]
+    boards = {}  # One board per (size, win length), reset between games
+    for record in records:
+        rules = (record.size, record.win_length)
+        board = boards.get(rules)
+        if board is None:
+            board = boards[rules] = BitBoard(*rules)
+            if evals is not None:
+                window_counters(board)  # Attach the counters once, they follow every replayed stone
+        board.reset()
+        scores = []
+        opening = None
+        for board, side, index in replay(record, board):
+            if evals is not None:
+                scores.append(window_counters(board).evaluate(board, side))  # From the side that just moved
+            if len(board.history) == opening_plies:
+                opening = (rules, canonical_key(board, 0)[0], list(record.moves[:opening_plies]))
+        result = result_of(board)
+        report['games'] += 1
+        report['moves'] += len(record.moves)
+        report['results'][RESULTS[result]] += 1
+        if result != record.result:  # Saved with a different result than the moves give
+            report['mismatched_results'] += 1
+        if opening is not None:
+            rules, key, moves = opening
+            entry = openings.setdefault((rules, key), [rules, moves, 0, 0, 0])
+            entry[2] += 1
+            if result in (0, 1):
+                entry[3 + result] += 1
+        if evals is not None:
+            evals.write(json.dumps({'result': RESULTS[record.result], 'scores': scores}) + '\n')
+    report['average_length'] = report['moves'] / report['games'] if report['games'] else 0.0
+    ranked = sorted(openings.values(), key=lambda entry: -entry[2])[:top]
+    report['openings'] = [
+        {'size': rules[0], 'win_length': rules[1], 'moves': [divmod(cell, rules[0]) for cell in moves], 'games': games,
+         'first_win_rate': first / games, 'second_win_rate': second / games}
+        for rules, moves, games, first, second in ranked
+    ]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay saved games and report results and openings")
+    parser.add_argument('paths', nargs='*', default=[RECORDS_DIR], help="records folders or .seg files")
+    parser.add_argument('--openings', type=int, default=OPENING_PLIES, help="moves that make up an opening")
+    parser.add_argument('--top', type=int, default=TOP_OPENINGS, help="most played openings to list")
+    parser.add_argument('--evals', help="write the evaluation after every move to this file, one JSON line per game")
+    args = parser.parse_args()
+    evals = open(args.evals, 'w') if args.evals else None
+    try:
+        report = analyse(read_records(args.paths), evals, args.openings, args.top)
+    finally:
+        if evals is not None:
+            evals.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+# Board size and win length: the one place every front-end and the AI read the rules from
+
+GRID_SIZE = 11  # Number of rows and columns
+WIN_LENGTH = 4  # Number of tiles in a row needed to win
+MIN_SIZE = 3  # Smallest board the game accepts
+MAX_SIZE = 32  # Largest board the game accepts
+
+
+class Rules:
+    def __init__(self, size=GRID_SIZE, win_length=WIN_LENGTH):
+        if not MIN_SIZE <= size <= MAX_SIZE:
+            raise ValueError(f"board size must be between {MIN_SIZE} and {MAX_SIZE}, not {size}")
+        if not 2 <= win_length <= size:
+            raise ValueError(f"win length must be between 2 and the board size ({size}), not {win_length}")
+        self.size = size
+        self.win_length = win_length
+
+    def __repr__(self):
+        return f"Rules(size={self.size}, win_length={self.win_length})"
+
+
+def add_rules_arguments(parser): # --size and --win-length for a front-end's argument parser
+    parser.add_argument('--size', type=int, default=GRID_SIZE, help=f"rows and columns on the board, {MIN_SIZE} to {MAX_SIZE}")
+    parser.add_argument('--win-length', type=int, default=WIN_LENGTH, help="tiles in a row needed to win")
+
+
+def rules_from_args(parser, args): # Rules from parsed arguments, reporting bad values as a usage error
+    try:
+        return Rules(args.size, args.win_length)
+    except ValueError as error:
+        parser.error(str(error))
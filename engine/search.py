@@ -0,0 +1,242 @@
+# Negamax alpha-beta search over a BitBoard
+
+import time
+
+from engine.candidates import CANDIDATE_DISTANCE, candidate_tracker
+from engine.geometry import geometry
+from engine.symmetry import cell_maps, inverse, symmetric_hash
+from engine.threats import ThreatSolver
+from engine.tt import EXACT, LOWER, UPPER
+from engine.windows import window_counters
+from engine import vector_eval
+
+WIN_SCORE = 1000000  # Score of a completed line, reduced by the number of plies needed to reach it
+INFINITY = WIN_SCORE * 10
+MAX_DEPTH = 32  # Deepest iteration when only a time budget limits the search
+MATE_RANGE = 1000  # Scores this close to WIN_SCORE are forced wins or losses
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def evaluate(board, side): # Open-window score for `side` minus the same for the opponent
+    mine, theirs = board.stones[side], board.stones[1 - side]
+    weights = geometry(board).weights
+    score = 0
+    for window in geometry(board).windows:
+        if window & theirs:
+            if not window & mine:
+                score -= weights[(window & theirs).bit_count()]
+        elif window & mine:
+            score += weights[(window & mine).bit_count()]
+    return score
+
+
+def ordered_moves(board): # Empty cells next to a stone, closest to the centre first
+    geo = geometry(board)
+    occupied = board.stones[0] | board.stones[1]
+    if not occupied:
+        return [geo.centre]
+    near = 0
+    for shift in geo.neighbour_shifts:
+        near |= occupied << shift | occupied >> shift
+    near &= board.empty_mask()
+    moves = []
+    while near:
+        low = near & -near
+        moves.append(low.bit_length() - 1)
+        near ^= low
+    moves.sort(key=geo.centre_distance.__getitem__)
+    return moves
+
+
+def to_tt(value, ply): # Store wins as a distance from this node so they stay valid at any ply
+    if value > WIN_SCORE - MATE_RANGE:
+        return value + ply
+    if value < -WIN_SCORE + MATE_RANGE:
+        return value - ply
+    return value
+
+
+def from_tt(value, ply):
+    if value > WIN_SCORE - MATE_RANGE:
+        return value - ply
+    if value < -WIN_SCORE + MATE_RANGE:
+        return value + ply
+    return value
+
+
+class Searcher:
+    def __init__(self, board, depth=4, time_limit_ms=None, tt=None, distance=CANDIDATE_DISTANCE, vectorized=None, book=None, symmetric=True, threats=True):
+        self.board = board
+        self.candidates = candidate_tracker(board, distance)  # Moves near the stones, ranked by threat
+        self.counters = window_counters(board)  # Running evaluation, finished lines and threats
+        if vectorized is None:
+            vectorized = vector_eval.available  # Use NumPy whenever it is installed
+        self.vector = vector_eval.vector_board(board) if vectorized and vector_eval.supports(board) else None  # Threat map of the whole board for the root
+        self.tt = tt  # Optional TranspositionTable shared between searches
+        self.book = book  # Optional OpeningBook checked before searching
+        self.threats = ThreatSolver(board) if threats else None  # Looks for a forced win by threats before searching
+        self.symmetry = symmetric_hash(board) if symmetric else None  # Lets mirrored and rotated positions share table entries
+        self.maps = cell_maps(board)  # Moves go into the table in the orientation of its key
+        self.depth = depth  # Deepest iteration, in plies from the root
+        self.time_limit_ms = time_limit_ms  # Optional budget per move, None to always finish the depth
+        self.root = None  # Optional list of root moves to search instead of every candidate
+        self.nodes = 0  # Positions visited by the last search
+        self.cutoffs = 0  # Beta cutoffs in the last search
+        self.depth_reached = 0  # Deepest iteration the last search finished
+        self.iterations = []  # (depth, move, score) of every iteration the last search finished
+        self.timed_out = False  # True if the last search ran out of time before finishing its depth
+        self.stopped = False  # Set from another thread by stop() to end the search early
+        self.stop_event = None  # multiprocessing.Event that does the same for a search in a worker process
+        self.deadline = None
+
+    def stop(self): # Ask a running search to finish as if it had run out of time
+        self.stopped = True
+
+    def search(self, side): # Best move for `side` and its score, from side's point of view
+        # Iterative deepening: each finished depth orders the next one, and running out
+        # of time returns the result of the last depth that finished
+        self.nodes = 0
+        self.cutoffs = 0
+        self.depth_reached = 0
+        self.iterations = []
+        self.timed_out = False
+        self.deadline = None
+        if self.tt is not None:
+            self.tt.new_search()
+        if self.book is not None:
+            found = self.book.probe(self.board, side)
+            if found is not None:
+                return found
+        if self.time_limit_ms is not None:
+            self.deadline = time.perf_counter() + self.time_limit_ms / 1000  # The threat search comes out of the same budget
+        if self.threats is not None:
+            found = self.threats.solve(side, self.deadline)
+            if found is not None:
+                return found[0], WIN_SCORE - found[1]
+        best_move, best_score = None, 0
+        max_depth = min(self.depth, self.board.empty_mask().bit_count())
+        for depth in range(1, max_depth + 1):
+            move, score, finished = self.search_root(side, depth, best_move)
+            if not finished:
+                self.timed_out = True
+                if best_move is None:
+                    best_move, best_score = move, score  # Nothing finished, so take the best move seen so far
+                break
+            best_move, best_score = move, score
+            self.depth_reached = depth
+            self.iterations.append((depth, move, score))
+            if abs(score) > WIN_SCORE - MATE_RANGE:
+                break  # Forced win or loss found, deeper searches cannot change it
+        return best_move, best_score
+
+    def table_key(self, side): # Transposition table key and the transform from the board to the key's orientation
+        if self.symmetry is None:
+            return self.board.position_key(side), 0
+        return self.symmetry.key(side)
+
+    def root_moves(self, side): # Candidate moves, most threatening first, open lines included when NumPy is there
+        if self.root is not None:
+            return list(self.root)  # Already ordered by whoever handed out the moves
+        if self.vector is not None:
+            return self.vector.rank(self.candidates.moves(), side)
+        return self.candidates.ranked(side)
+
+    def search_root(self, side, depth, first_move=None): # One fixed-depth iteration: move, score, finished
+        board = self.board
+        start = len(board.history)
+        moves = self.root_moves(side)
+        if not moves:
+            return None, 0, True
+        if self.tt is not None:
+            key, t = self.table_key(side)
+            if first_move is None:
+                entry = self.tt.probe(key)
+                if entry is not None and entry[4] is not None:
+                    first_move = self.maps[inverse(t)][entry[4]]
+        if first_move is not None and first_move in moves:
+            moves.remove(first_move)
+            moves.insert(0, first_move)  # Best move of the previous iteration goes first
+        best_move, best_score = moves[0], -INFINITY
+        alpha = -INFINITY
+        try:
+            for move in moves:
+                board.place(move, side)
+                if self.counters.lines[side]:
+                    score = WIN_SCORE - 1
+                else:
+                    score = -self.negamax(depth - 1, 1 - side, -INFINITY, -alpha, 1)
+                board.undo()
+                if score > best_score:
+                    best_move, best_score = move, score
+                    alpha = max(alpha, score)
+        except SearchTimeout:
+            while len(board.history) > start:  # Unwind the moves the search was in the middle of
+                board.undo()
+            return best_move, best_score, False
+        if self.tt is not None and self.root is None:  # A score over only some of the moves is no score for the position
+            self.tt.store(key, depth, to_tt(best_score, 0), EXACT, self.maps[t][best_move])
+        return best_move, best_score, True
+
+    def negamax(self, depth, side, alpha, beta, ply):
+        self.nodes += 1
+        if self.nodes & 63 == 0 and (self.stopped or self.deadline is not None and time.perf_counter() > self.deadline
+                                     or self.stop_event is not None and self.stop_event.is_set()):
+            raise SearchTimeout()
+        board = self.board
+        counters = self.counters
+        if counters.threats[side]:
+            return WIN_SCORE - ply - 1  # The side to move can finish a line right now
+        tt = self.tt
+        tt_move = None
+        if tt is not None:
+            key, t = self.table_key(side)
+            entry = tt.probe(key)
+            if entry is not None:
+                if entry[4] is not None:
+                    tt_move = self.maps[inverse(t)][entry[4]]
+                if entry[1] >= depth:
+                    value = from_tt(entry[2], ply)
+                    flag = entry[3]
+                    if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                        return value
+        if depth == 0:
+            score = counters.evaluate(board, side)
+            if tt is not None:
+                tt.store(key, 0, score, EXACT, None)
+            return score
+        moves = self.candidates.ranked(side)
+        if not moves:
+            return 0  # Board full, a tie
+        if tt_move is not None and tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)  # Try the best move from an earlier search first
+        alpha_start = alpha
+        best = -INFINITY
+        best_move = None
+        for move in moves:
+            board.place(move, side)
+            if counters.lines[side]:
+                score = WIN_SCORE - ply - 1
+            else:
+                score = -self.negamax(depth - 1, 1 - side, -beta, -alpha, ply + 1)
+            board.undo()
+            if score > best:
+                best = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self.cutoffs += 1
+                        break
+        if tt is not None:
+            if best <= alpha_start:
+                flag = UPPER
+            elif best >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            tt.store(key, depth, to_tt(best, ply), flag, None if best_move is None else self.maps[t][best_move])
+        return best
@@ -0,0 +1,85 @@
+# The 8 rotations and reflections of the square board, as cell-index permutations
+#
+# Transform t swaps rows and columns if bit 4 is set, then flips the rows if bit 2
+# is set and the columns if bit 1 is set. Transform 0 leaves the board alone.
+
+_map_cache = {}
+
+
+def transform_cell(row, col, t, size):
+    if t & 4:
+        row, col = col, row
+    if t & 2:
+        row = size - 1 - row
+    if t & 1:
+        col = size - 1 - col
+    return row, col
+
+
+def cell_maps(board): # maps[t][index] is where cell `index` lands under transform t
+    key = (board.size, board.stride)
+    if key not in _map_cache:
+        size, stride = board.size, board.stride
+        maps = []
+        for t in range(8):
+            mapping = [-1] * (size * stride)  # Padding cells have nowhere to go
+            for row in range(size):
+                for col in range(size):
+                    new_row, new_col = transform_cell(row, col, t, size)
+                    mapping[row * stride + col] = new_row * stride + new_col
+            maps.append(mapping)
+        _map_cache[key] = maps
+    return _map_cache[key]
+
+
+def inverse(t): # Transform that undoes t
+    return 11 - t if t in (5, 6) else t  # Only the two quarter turns are not their own inverse
+
+
+def canonical_key(board, side): # Position key of the orientation with the smallest hash, and its transform
+    maps = cell_maps(board)
+    keys = board.keys
+    best_hash, best_t = None, 0
+    for t in range(8):
+        mapping = maps[t]
+        stone_hash = 0
+        for index in board.history:
+            stone_hash ^= keys[0 if board.stones[0] >> index & 1 else 1][mapping[index]]
+        if best_hash is None or stone_hash < best_hash:
+            best_hash, best_t = stone_hash, t
+    return best_hash ^ keys[2] if side else best_hash, best_t
+
+
+class SymmetricHash:
+    # The board hash in all 8 orientations, updated as stones are placed and removed
+    def __init__(self, board):
+        self.board = board
+        self.maps = cell_maps(board)
+        self.keys = board.keys
+        self.reset()
+        board.watchers.append(self)  # The board calls placed(), removed() and reset() on us
+
+    def reset(self):
+        self.hashes = [0] * 8
+        for index in self.board.history:
+            self.placed(index, self.board.side_at(index))
+
+    def placed(self, index, side):
+        keys = self.keys[side]
+        hashes = self.hashes
+        for t, mapping in enumerate(self.maps):
+            hashes[t] ^= keys[mapping[index]]
+
+    removed = placed  # XOR takes the stone back out
+
+    def key(self, side): # Same as canonical_key(board, side), without looking at the stones
+        hashes = self.hashes
+        best = min(hashes)
+        return best ^ self.keys[2] if side else best, hashes.index(best)
+
+
+def symmetric_hash(board): # The board's SymmetricHash, created on first use
+    for watcher in board.watchers:
+        if isinstance(watcher, SymmetricHash):
+            return watcher
+    return SymmetricHash(board)
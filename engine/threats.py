@@ -0,0 +1,183 @@
+# Threat-space search: forced wins built only from threats the opponent has to answer
+#
+# A four is a window one stone short of a line with no opposing stone in it: the
+# opponent must take its last cell or lose, and two fours with different gaps
+# cannot both be stopped. Looking only at moves that make fours (victory by
+# continuous fours, VCF) keeps the tree tiny, so wins many plies deep are found
+# long before a full-width search would see them, and every win it reports is
+# forced. With threes allowed (VCT) the attacker may also play a move after which
+# a VCF would follow if the opponent did nothing; the opponent then gets to try
+# every cell the VCF touched, every cell that could turn the replies it forces into
+# a four of their own, and every four of their own.
+
+import time
+
+from engine.geometry import geometry
+from engine.windows import window_counters
+
+THREAT_NODES = 20000  # Most positions one solve may visit
+THREAT_MS = 100  # Longest one solve may take (milliseconds)
+VCF_DEPTH = 12  # Most fours in a row the attacker may play
+VCT_DEPTH = 2  # Most threes the attacker may play, each followed by a VCF
+
+
+class ThreatLimit(Exception):
+    pass
+
+
+class ThreatSolver:
+    def __init__(self, board, max_nodes=THREAT_NODES, time_limit_ms=THREAT_MS, threes=True):
+        self.board = board
+        self.counters = window_counters(board)
+        geo = geometry(board)
+        self.window_cells = geo.window_cells
+        self.cell_window_ids = geo.cell_window_ids
+        self.centre_distance = geo.centre_distance
+        self.max_nodes = max_nodes
+        self.time_limit_ms = time_limit_ms
+        self.threes = threes  # Also look for wins that start with threes, not just fours
+        self.touched = set()  # Cells a VCF looked at, the defender's answers to a three
+        self.replies = set()  # Cells the defender was forced to take in those VCFs
+        self.nodes = 0  # Positions visited by the last solve
+        self.solves = 0  # Totals since the solver was made
+        self.wins = 0
+        self.aborted = 0
+        self.total_nodes = 0
+        self.total_ms = 0.0
+        self.deadline = None
+
+    def solve(self, side, deadline=None): # (move, plies to win) if `side` has a forced win by threats, else None
+        # Stops at its own time limit or at `deadline` (a perf_counter time, such as the caller's budget), whichever is first
+        start = time.perf_counter()
+        self.nodes = 0
+        self.deadline = start + self.time_limit_ms / 1000 if self.time_limit_ms else None
+        if deadline is not None and (self.deadline is None or deadline < self.deadline):
+            self.deadline = deadline
+        depth = len(self.board.history)
+        try:
+            found = self.vct(side, VCT_DEPTH) if self.threes else self.vcf(side, VCF_DEPTH)
+        except ThreatLimit:
+            while len(self.board.history) > depth:  # Unwind the moves the solver was in the middle of
+                self.board.undo()
+            found = None
+            self.aborted += 1
+        self.solves += 1
+        self.wins += found is not None
+        self.total_nodes += self.nodes
+        self.total_ms += (time.perf_counter() - start) * 1000
+        return found
+
+    def stats(self):
+        return {
+            'solves': self.solves,
+            'wins': self.wins,
+            'aborted': self.aborted,
+            'nodes': self.total_nodes,
+            'avg_ms': self.total_ms / self.solves if self.solves else 0.0,
+        }
+
+    def tick(self):
+        self.nodes += 1
+        if self.nodes > self.max_nodes or (self.nodes & 15 == 0 and self.deadline is not None and time.perf_counter() > self.deadline):
+            raise ThreatLimit()
+
+    def gaps(self, side): # Empty cells that would complete a line for `side`
+        if not self.counters.threats[side]:
+            return set()
+        mine, theirs = self.counters.counts[side], self.counters.counts[1 - side]
+        short = self.board.win_length - 1
+        is_empty = self.board.is_empty
+        found = set()
+        for window, count in enumerate(mine):
+            if count == short and not theirs[window]:
+                for index in self.window_cells[window]:
+                    if is_empty(index):
+                        found.add(index)
+        return found
+
+    def builders(self, side, stones): # Empty cells that bring a window with `stones` of ours and none of theirs one closer
+        mine, theirs = self.counters.counts[side], self.counters.counts[1 - side]
+        is_empty = self.board.is_empty
+        found = {}
+        for window, count in enumerate(mine):
+            if count == stones and not theirs[window]:
+                for index in self.window_cells[window]:
+                    if is_empty(index):
+                        found[index] = found.get(index, 0) + 1
+        return sorted(found, key=lambda index: (-found[index], self.centre_distance[index]))  # Cells in the most windows first
+
+    def counter_cells(self, side): # Empty cells that share a window free of `side` with a forced reply
+        # A defender stone there could join the stones the VCF forces them to play and make a four of their own
+        mine = self.counters.counts[side]
+        is_empty = self.board.is_empty
+        found = set()
+        for reply in self.replies:
+            for window in self.cell_window_ids[reply]:
+                if not mine[window]:
+                    for index in self.window_cells[window]:
+                        if is_empty(index):
+                            found.add(index)
+        return found
+
+    def vcf(self, side, depth): # Win by continuous fours: (move, plies) or None
+        self.tick()
+        wins = self.gaps(side)
+        if wins:
+            self.touched.update(wins)
+            return min(wins), 1
+        theirs = self.gaps(1 - side)
+        if len(theirs) > 1 or depth == 0:
+            return None  # They win first, or we are out of fours
+        board = self.board
+        for move in self.builders(side, board.win_length - 2):
+            if theirs and move not in theirs:
+                continue  # Their four has to be blocked, so only a block that makes a four of ours keeps the initiative
+            self.touched.add(move)
+            board.place(move, side)
+            forced = self.gaps(side)
+            found = None
+            self.touched.update(forced)  # The defender's answers to a three include blocking these
+            if len(forced) > 1:
+                found = move, 3  # Two fours: they block one, we complete the other
+            elif forced:
+                reply = forced.pop()
+                self.replies.add(reply)
+                board.place(reply, 1 - side)
+                if not self.counters.lines[1 - side]:
+                    result = self.vcf(side, depth - 1)
+                    if result is not None:
+                        found = move, result[1] + 2
+                board.undo()
+            board.undo()
+            if found is not None:
+                return found
+        return None
+
+    def vct(self, side, depth): # Win by fours and threes: (move, plies) or None
+        found = self.vcf(side, VCF_DEPTH)
+        if found is not None or depth == 0 or self.gaps(1 - side):
+            return found
+        board = self.board
+        for move in self.builders(side, board.win_length - 3):
+            board.place(move, side)
+            self.touched = set()
+            self.replies = set()
+            threat = self.vcf(side, VCF_DEPTH)  # What we threaten if they ignore the three
+            longest = None
+            if threat is not None:
+                defences = (self.touched | self.counter_cells(side) | set(self.builders(1 - side, board.win_length - 2))) - {move}
+                longest = 0
+                for defence in sorted(defences):
+                    if not board.is_empty(defence):
+                        continue
+                    board.place(defence, 1 - side)
+                    result = None if self.counters.lines[1 - side] else self.vct(side, depth - 1)
+                    board.undo()
+                    if result is None:
+                        longest = None  # This answer holds, so the three does not win
+                        break
+                    longest = max(longest, result[1] + 2)
+            board.undo()
+            if longest:
+                return move, longest
+        return None
@@ -0,0 +1,82 @@
+# Bounded transposition table for the alpha-beta search
+#
+# Each bucket has two slots. The first keeps the entry searched to the greatest
+# depth by the current search, or anything if its entry is from an earlier search;
+# the second always takes the newest entry that did not fit in the first or was
+# pushed out of it. A key is only ever kept in one of the two, and an entry is not
+# replaced by a shallower one for the same key during the search that stored it.
+
+EXACT = 0  # Value is the exact score of the position
+LOWER = 1  # Search failed high, value is a lower bound
+UPPER = 2  # Search failed low, value is an upper bound
+
+ENTRY_BYTES = 200  # Rough size of one stored entry: the tuple, its ints and the list slot
+
+
+class TranspositionTable:
+    def __init__(self, megabytes=16):
+        self.megabytes = megabytes
+        self.buckets = max(1, int(megabytes * 1024 * 1024) // (2 * ENTRY_BYTES))
+        self.generation = 0  # Counts searches, so entries from earlier ones can be told apart
+        self.clear()
+
+    def clear(self):
+        self.slots = [None] * (self.buckets * 2)  # Entries are (key, depth, value, flag, move, generation)
+        self.hits = 0  # Probes that found their key
+        self.misses = 0  # Probes that found nothing for their key
+        self.collisions = 0  # Misses where the bucket held other positions
+        self.stores = 0
+
+    def probe(self, key):
+        slot = (key % self.buckets) * 2
+        slots = self.slots
+        entry = slots[slot]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        other = slots[slot + 1]
+        if other is not None and other[0] == key:
+            self.hits += 1
+            return other
+        self.misses += 1
+        if entry is not None or other is not None:
+            self.collisions += 1
+        return None
+
+    def new_search(self): # Called at the start of each search, entries stored before it give up the first slot to any new one
+        self.generation += 1
+
+    def store(self, key, depth, value, flag, move):
+        slot = (key % self.buckets) * 2
+        slots = self.slots
+        kept = slots[slot]
+        other = slots[slot + 1]
+        self.stores += 1
+        for same in (kept, other):
+            if same is not None and same[0] == key and same[1] > depth and same[5] == self.generation:
+                return  # A deeper result from this search is worth more than a shallow one
+        entry = (key, depth, value, flag, move, self.generation)
+        if kept is None or kept[0] == key:
+            slots[slot] = entry
+            if other is not None and other[0] == key:
+                slots[slot + 1] = None  # An older copy would only shadow this one
+        elif depth >= kept[1] or kept[5] != self.generation:
+            slots[slot] = entry
+            slots[slot + 1] = kept  # The entry it pushed out becomes the newest in the second slot
+        else:
+            slots[slot + 1] = entry
+
+    def stats(self):
+        probes = self.hits + self.misses
+        used = sum(1 for entry in self.slots if entry is not None)
+        return {
+            'megabytes': self.megabytes,
+            'entries': len(self.slots),
+            'used': used,
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'stores': self.stores,
+            'hit_rate': self.hits / probes if probes else 0.0,
+        }
+
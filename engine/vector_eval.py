@@ -0,0 +1,133 @@
+# Whole-board evaluation with NumPy: every line window is scored in one gather and reduction
+#
+# NumPy is optional. Without it, `available` is False and callers keep using the
+# pure-Python evaluation in engine.search.
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+available = np is not None
+MAX_WIN_LENGTH = 10  # The lookup tables have 3 ** win_length rows, so longer lines stay in Python
+
+_evaluators = {}
+
+
+class VectorEvaluator:
+    # Index tables for one board shape, shared by every VectorBoard of that shape.
+    # A window's contents are read as a base-3 number, so its score for either side
+    # is a single lookup in a table built once here.
+    def __init__(self, size, win_length):
+        self.size = size
+        self.win_length = win_length
+        self.powers = 3 ** np.arange(win_length + 2)
+        self.windows = self.line_windows(win_length)  # (windows, win_length) flat cell indexes
+        self.open_windows = self.line_windows(win_length + 1)  # One longer, to spot lines with room at both ends
+
+        # Same weights as engine.search.evaluate and CandidateTracker.threat_score
+        weights = [0] + [10 ** (n - 1) for n in range(1, win_length + 1)]
+        win, block = weights[win_length] * 100, weights[win_length] * 50
+        attack = [weights[n + 1] if n + 1 < win_length else win for n in range(win_length + 1)]
+        defence = [weights[n + 1] if n + 1 < win_length else block for n in range(win_length + 1)]
+        self.scores, self.values = self.tables(win_length, weights, attack, defence)
+
+        # Bonus for two or more stones with an empty cell at each end of the line
+        bonus = [0, 0] + [10 ** (n - 1) for n in range(2, win_length + 2)]
+        _, self.open_values = self.tables(win_length + 1, bonus, bonus, [value // 2 for value in bonus])
+
+    def line_windows(self, length): # Every run of `length` cells along the four axes
+        size = self.size
+        index = np.arange(size * size).reshape(size, size)
+        windows = []
+        if length <= size:
+            windows.append(np.lib.stride_tricks.sliding_window_view(index, length, axis=1).reshape(-1, length))
+            windows.append(np.lib.stride_tricks.sliding_window_view(index, length, axis=0).reshape(-1, length))
+            flipped = index[:, ::-1]
+            for offset in range(-(size - length), size - length + 1):
+                for diagonal in (np.diagonal(index, offset), np.diagonal(flipped, offset)):
+                    windows.append(np.lib.stride_tricks.sliding_window_view(diagonal, length).reshape(-1, length))
+        if not windows:
+            return np.zeros((0, length), dtype=np.intp)
+        return np.ascontiguousarray(np.concatenate(windows), dtype=np.intp)
+
+    def tables(self, length, weights, attack, defence):
+        # Per side and window code: the window's score, and the value of each of its empty cells
+        codes = 3 ** length
+        digits = (np.arange(codes)[:, None] // 3 ** np.arange(length)) % 3  # Cell contents for every code
+        scores = np.zeros((2, codes), dtype=np.int64)
+        values = np.zeros((2, codes, length), dtype=np.float64)
+        weights, attack, defence = np.array(weights), np.array(attack), np.array(defence)
+        for side in (0, 1):
+            mine = (digits == side + 1).sum(axis=1)
+            theirs = (digits == 2 - side).sum(axis=1)
+            live = (mine == 0) | (theirs == 0)  # A window with both colours can never be completed
+            scores[side] = (weights[mine] - weights[theirs]) * live
+            value = np.where(theirs == 0, attack[np.minimum(mine, length - 1)], np.where(mine == 0, defence[np.minimum(theirs, length - 1)], 0))
+            values[side] = (digits == 0) * value[:, None]
+        return scores, values
+
+    def codes(self, cells_by_cell, windows):
+        return cells_by_cell[windows].astype(np.int64) @ self.powers[:windows.shape[1]]
+
+    def evaluate(self, cells_by_cell, side): # Same score as engine.search.evaluate, for the side to move
+        return int(self.scores[side][self.codes(cells_by_cell, self.windows)].sum())
+
+    def threat_map(self, cells_by_cell, side): # Per-cell value of playing there: own lines extended plus theirs blocked
+        cells = self.size * self.size
+        threat = np.bincount(self.windows.ravel(), self.values[side][self.codes(cells_by_cell, self.windows)].ravel(), cells)
+        if len(self.open_windows):
+            open_values = self.open_values[side][self.codes(cells_by_cell, self.open_windows)]
+            threat += np.bincount(self.open_windows.ravel(), open_values.ravel(), cells)
+        return threat
+
+
+def vector_evaluator(size, win_length):
+    key = (size, win_length)
+    if key not in _evaluators:
+        _evaluators[key] = VectorEvaluator(size, win_length)
+    return _evaluators[key]
+
+
+class VectorBoard:
+    # Keeps an int8 copy of a BitBoard (0 empty, 1 side 0, 2 side 1) up to date as stones are placed and removed
+    def __init__(self, board):
+        self.board = board
+        self.evaluator = vector_evaluator(board.size, board.win_length)
+        self.reset()
+        board.watchers.append(self)
+
+    def reset(self):
+        self.cells = np.zeros(self.board.size * self.board.size, dtype=np.int8)
+        for index in self.board.history:
+            self.placed(index, self.board.side_at(index))
+
+    def _flat(self, index):
+        row, col = self.board.cell(index)
+        return row * self.board.size + col
+
+    def placed(self, index, side):
+        self.cells[self._flat(index)] = side + 1
+
+    def removed(self, index, side):
+        self.cells[self._flat(index)] = 0
+
+    def evaluate(self, board, side):
+        return self.evaluator.evaluate(self.cells, side)
+
+    def rank(self, moves, side): # Moves sorted by the threat map, one vectorised call for all of them
+        if len(moves) < 2:
+            return moves
+        threat = self.evaluator.threat_map(self.cells, side).tolist()
+        return sorted(moves, key=lambda index: -threat[self._flat(index)])
+
+
+def supports(board): # True if NumPy is installed and the board's lines are short enough for the tables
+    return available and board.win_length <= MAX_WIN_LENGTH
+
+
+def vector_board(board): # The board's VectorBoard, created on first use
+    for watcher in board.watchers:
+        if isinstance(watcher, VectorBoard):
+            return watcher
+    return VectorBoard(board)
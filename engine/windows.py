@@ -0,0 +1,97 @@
+# Per-window stone counts, updated as stones are placed and removed
+#
+# Every cell knows the ids of the win-length windows through it (engine.geometry),
+# so a move only touches those windows. The evaluation score, finished lines and
+# one-short threats are kept as running totals and read in O(1).
+
+from engine.geometry import geometry
+
+
+class WindowCounters:
+    def __init__(self, board):
+        self.board = board
+        geo = geometry(board)
+        self.cell_windows = geo.cell_window_ids
+        self.window_count = len(geo.windows)
+        self.weights = geo.weights
+        self.length = board.win_length
+        self.reset()
+        board.watchers.append(self)  # The board calls placed(), removed() and reset() on us
+
+    def reset(self):
+        self.counts = ([0] * self.window_count, [0] * self.window_count)  # Stones of each side in each window
+        self.score = 0  # Same as engine.search.evaluate(board, 0)
+        self.lines = [0, 0]  # Completed windows per side
+        self.threats = [0, 0]  # Windows one stone short of a line with no opposing stone, per side
+        for index in self.board.history:
+            self.placed(index, self.board.side_at(index))
+
+    def placed(self, index, side):
+        mine, theirs = self.counts[side], self.counts[1 - side]
+        weights = self.weights
+        sign = 1 if side == 0 else -1
+        short = self.length - 1
+        for window in self.cell_windows[index]:
+            count = mine[window]
+            mine[window] = count + 1
+            other = theirs[window]
+            if not other:
+                self.score += sign * (weights[count + 1] - weights[count])
+                if count + 1 == short:
+                    self.threats[side] += 1
+                elif count == short:
+                    self.threats[side] -= 1
+                    self.lines[side] += 1
+            elif not count:  # The window was the opponent's alone and is now dead
+                self.score += sign * weights[other]
+                if other == short:
+                    self.threats[1 - side] -= 1
+
+    def removed(self, index, side):
+        mine, theirs = self.counts[side], self.counts[1 - side]
+        weights = self.weights
+        sign = 1 if side == 0 else -1
+        short = self.length - 1
+        for window in self.cell_windows[index]:
+            count = mine[window]
+            mine[window] = count - 1
+            other = theirs[window]
+            if not other:
+                self.score -= sign * (weights[count] - weights[count - 1])
+                if count == short:
+                    self.threats[side] -= 1
+                elif count - 1 == short:
+                    self.threats[side] += 1
+                    self.lines[side] -= 1
+            elif count == 1:  # The window is the opponent's alone again
+                self.score -= sign * weights[other]
+                if other == short:
+                    self.threats[1 - side] += 1
+
+    def evaluate(self, board, side): # Open-window score for `side` minus the same for the opponent
+        return self.score if side == 0 else -self.score
+
+    def has_won(self, side):
+        return self.lines[side] > 0
+
+    def threat_score(self, index, side): # How much a stone here extends our lines plus how much it blocks theirs
+        mine, theirs = self.counts[side], self.counts[1 - side]
+        weights = self.weights
+        length = self.length
+        score = 0
+        for window in self.cell_windows[index]:
+            other = theirs[window]
+            if other:
+                if not mine[window]:
+                    score += weights[other + 1] if other + 1 < length else weights[length] * 50  # Block a win
+            else:
+                count = mine[window]
+                score += weights[count + 1] if count + 1 < length else weights[length] * 100  # Complete a line
+        return score
+
+
+def window_counters(board): # The board's WindowCounters, created on first use
+    for watcher in board.watchers:
+        if isinstance(watcher, WindowCounters):
+            return watcher
+    return WindowCounters(board)
@@ -0,0 +1,145 @@
+# Runs the AI search on a background thread so a game loop can keep drawing while it thinks
+#
+# With pondering on, the worker also thinks during the opponent's turn. The alpha-beta
+# engine guesses the opponent's reply (the table's best move, else the top candidate)
+# and searches the position after it; if the guess is right that search simply carries
+# on as the real one, with the time already spent counting towards the move. Either
+# way its transposition table entries are kept for the real search. The MCTS engine
+# grows its tree from the current position, and the real search reuses the subtree of
+# whatever move was played.
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from engine.bitboard import BitBoard
+from engine.candidates import candidate_tracker
+from engine.mcts import MonteCarloSearcher
+from engine.search import Searcher
+from engine.symmetry import canonical_key, cell_maps, inverse
+
+PONDER_PLAYOUTS = 200000  # Most playouts an MCTS ponder may run, so the tree cannot grow without bound
+
+
+class SearchWorker:
+    def __init__(self, depth, time_limit_ms=None, tt=None, book=None, engine='alphabeta', ponder=False):
+        self.depth = depth
+        self.time_limit_ms = time_limit_ms
+        self.tt = tt  # Only ever used from the worker thread
+        self.book = book  # Optional OpeningBook checked before searching
+        self.engine = engine  # 'alphabeta' or 'mcts'
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ai-search')
+        self.searcher = None
+        self.mcts = None  # The MCTS searcher, kept from move to move
+        self.future = None
+        self.pondering = ponder  # Think during the opponent's turn
+        self.ponder_history = None  # Game the running ponder search started from, None when not pondering
+        self.ponder_move = None  # The reply the alpha-beta ponder search is betting on
+        self.ponder_started = 0.0
+        self.ponders = 0  # Opponent moves that arrived while pondering
+        self.ponder_hits = 0  # ...and were the move the ponder search expected
+        self.requested = None  # When the running real search was asked for
+        self.response_times = []  # Seconds from start() until the move was ready, one per move
+
+    def start(self, board, side): # Search a copy of the board, so the caller can keep reading the real one
+        self.requested = time.perf_counter()
+        if self.ponder_history is not None:
+            hit = self.ponder_hit(board)
+            self.ponders += 1
+            self.ponder_hits += hit
+            if hit and self.engine != 'mcts':
+                self.ponder_history = None  # The ponder search becomes the real one
+                if self.time_limit_ms is not None:
+                    remaining = self.ponder_started + self.time_limit_ms / 1000 - time.perf_counter()
+                    self.searcher.time_limit_ms = max(1, remaining * 1000)  # Used if the search has not got going yet
+                    self.searcher.deadline = time.perf_counter() + max(0, remaining)
+                return
+        self.cancel()
+        if self.engine == 'mcts':
+            self.searcher = self.mcts_searcher(board)
+            self.searcher.time_limit_ms, self.searcher.max_playouts = self.time_limit_ms, None
+        else:
+            self.searcher = Searcher(board.copy(), self.depth, self.time_limit_ms, self.tt, book=self.book)
+        self.future = self.executor.submit(self.searcher.search, side)
+
+    def mcts_searcher(self, board):
+        if self.mcts is None:
+            self.mcts = MonteCarloSearcher(BitBoard(board.size, board.win_length), self.time_limit_ms)
+        self.mcts.board.sync(board.history, board.stones)  # The same copy every move, so the tree carries over
+        self.mcts.stopped = False
+        return self.mcts
+
+    def ponder(self, board, side): # Think while the opponent, the side that is not `side`, chooses a move
+        if not self.pondering or board.is_full() or board.winner() is not None:
+            return
+        self.cancel()
+        opponent = 1 - side
+        if self.engine == 'mcts':
+            self.searcher = self.mcts_searcher(board)
+            self.searcher.time_limit_ms, self.searcher.max_playouts = None, PONDER_PLAYOUTS
+            self.future = self.executor.submit(self.searcher.search, opponent)
+        else:
+            self.ponder_move = self.predict(board, opponent)
+            if self.ponder_move is None:
+                return
+            position = board.copy()
+            position.place(self.ponder_move, opponent)
+            self.searcher = Searcher(position, self.depth, None, self.tt, book=self.book)  # No time limit until the guess is confirmed
+            self.future = self.executor.submit(self.searcher.search, side)
+        self.ponder_history = list(board.history)
+        self.ponder_started = time.perf_counter()
+
+    def predict(self, board, side): # Best move for `side` according to the table, or the top candidate
+        if self.tt is not None:
+            key, t = canonical_key(board, side)
+            entry = self.tt.probe(key)
+            if entry is not None and entry[4] is not None:
+                move = cell_maps(board)[inverse(t)][entry[4]]
+                if move >= 0 and board.is_empty(move):
+                    return move
+        moves = candidate_tracker(board.copy()).ranked(side)
+        return moves[0] if moves else None
+
+    def ponder_hit(self, board): # Did the opponent play the move the ponder search was working on
+        if board.history[:-1] != self.ponder_history:
+            return False
+        if self.engine == 'mcts':
+            children = list(self.searcher.root.children) if self.searcher.root_history == self.ponder_history else []
+            return bool(children) and max(children, key=lambda child: child.visits).move == board.history[-1]
+        return board.history[-1] == self.ponder_move
+
+    def ponder_stats(self):
+        responses = self.response_times
+        return {
+            'ponders': self.ponders,
+            'ponder_hits': self.ponder_hits,
+            'ponder_hit_rate': self.ponder_hits / self.ponders if self.ponders else 0.0,
+            'mean_response_ms': sum(responses) / len(responses) * 1000 if responses else 0.0,
+        }
+
+    def started(self): # True from start() until the result has been collected or cancelled
+        return self.future is not None and self.ponder_history is None
+
+    def busy(self): # Working on a real move, pondering does not count
+        return self.started() and not self.future.done()
+
+    def poll(self): # (move, score) once the search has finished, otherwise None
+        if not self.started() or not self.future.done():
+            return None
+        future, self.future = self.future, None
+        self.response_times.append(time.perf_counter() - self.requested)
+        return future.result()
+
+    def result(self): # Wait for the search started by start() and return its (move, score)
+        self.future.result()
+        return self.poll()
+
+    def cancel(self): # Stop the running search or ponder and throw its result away
+        if self.future is not None:
+            self.searcher.stop()
+            self.future.result()
+            self.future = None
+        self.ponder_history = None
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=True)
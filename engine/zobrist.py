@@ -0,0 +1,16 @@
+# Zobrist keys: one random 64-bit number per (side, cell), XORed into the board hash as stones come and go
+
+import random
+
+_key_cache = {}
+
+
+def zobrist_keys(cells): # Keys for side 0, keys for side 1, and the side-to-move key
+    if cells not in _key_cache:
+        rng = random.Random(cells)  # Fixed seed so hashes are the same in every process
+        _key_cache[cells] = (
+            [rng.getrandbits(64) for _ in range(cells)],
+            [rng.getrandbits(64) for _ in range(cells)],
+            rng.getrandbits(64),
+        )
+    return _key_cache[cells]
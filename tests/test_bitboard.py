@@ -0,0 +1,47 @@
+# Win detection on the bitboard, against a plain scan of every line
+import random
+
+from engine.bitboard import BitBoard, GridAdapter
+
+
+def has_line(board, side, length): # Every run of `length` cells, checked cell by cell
+    size = board.size
+    for row in range(size):
+        for col in range(size):
+            for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                cells = [(row + d_row * i, col + d_col * i) for i in range(length)]
+                if all(0 <= r < size and 0 <= c < size and board.side_at(board.index(r, c)) == side for r, c in cells):
+                    return True
+    return False
+
+
+def test_matches_a_plain_scan():
+    rng = random.Random(2023)
+    for size, win_length in ((11, 4), (7, 3), (15, 5), (5, 5)):
+        for _ in range(200):
+            board = BitBoard(size, win_length)
+            for ply in range(rng.randint(1, size * size // 2)):
+                board.place(rng.choice(list(board.legal_moves())), ply % 2)
+            for side in (0, 1):
+                assert board.has_won(side) == has_line(board, side, win_length), (size, win_length, board.history)
+
+
+def test_no_line_across_the_edge():
+    board = BitBoard(11, 4)
+    for row, col in ((0, 9), (0, 10), (1, 0), (1, 1)):  # Two at the end of one row, two at the start of the next
+        board.place(board.index(row, col), 0)
+    assert not board.has_won(0)
+    for row, col in ((3, 2), (4, 1), (5, 0), (6, 10)):  # An anti-diagonal that would wrap onto the far column
+        board.place(board.index(row, col), 1)
+    assert not board.has_won(1)
+
+
+def test_every_direction():
+    for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        board = BitBoard(11, 4)
+        grid = GridAdapter(board, ('player', 'ai'))
+        for i in range(4):
+            grid[3 + d_row * i][5 + d_col * i] = 'ai'
+        assert grid.winner() == 'ai' and grid.winner_at(3, 5) == 'ai' and grid.winner_at(0, 0) is None
+        board.undo()
+        assert board.winner() is None
@@ -0,0 +1,47 @@
+# Opening book file format and lookups through the board symmetries
+import os
+
+from engine.bitboard import BitBoard
+from engine.book import HEADER, RECORD, OpeningBook, save
+from engine.symmetry import canonical_key, cell_maps, transform_cell
+
+
+def test_header_and_records_sizes(tmp_path):
+    path = os.path.join(tmp_path, 'test.book')
+    save(path, 11, 4, 3, {5: (12, 7), 3: (13, -2)})
+    assert HEADER.size == 14 and os.path.getsize(path) == HEADER.size + 2 * RECORD.size
+    book = OpeningBook(path)
+    assert (book.size, book.win_length, book.stones, book.count) == (11, 4, 3, 2)
+    assert book.find(3) == (3, 13, -2) and book.find(5) == (5, 12, 7) and book.find(4) is None
+    book.close()
+
+
+def test_bad_files_miss(tmp_path):
+    path = os.path.join(tmp_path, 'test.book')
+    save(path, 11, 4, 3, {5: (12, 7)})
+    with open(path, 'ab') as book_file:
+        book_file.write(b'x')  # Length no longer matches the record count
+    book = OpeningBook(path)
+    assert book.data is None and book.probe(BitBoard(11, 4), 0) is None
+    assert OpeningBook(os.path.join(tmp_path, 'missing.book')).probe(BitBoard(11, 4), 0) is None
+
+
+def test_probe_answers_every_orientation(tmp_path):
+    size = 11
+    stones = [((1, 2), 0), ((4, 3), 1)]
+    answer = (2, 6)
+    board = BitBoard(size, 4)
+    for (row, col), side in stones:
+        board.place(board.index(row, col), side)
+    key, t = canonical_key(board, 0)
+    path = os.path.join(tmp_path, 'test.book')
+    save(path, size, 4, 3, {key: (cell_maps(board)[t][board.index(*answer)], 42)})
+    book = OpeningBook(path)
+    for turn in range(8):  # The same position turned and mirrored finds the same record, with the move turned along
+        turned = BitBoard(size, 4)
+        for (row, col), side in stones:
+            turned.place(turned.index(*transform_cell(row, col, turn, size)), side)
+        assert book.probe(turned, 0) == (turned.index(*transform_cell(*answer, turn, size)), 42)
+    assert book.probe(board, 1) is None  # Other side to move
+    assert book.hits == 8 and book.misses == 1
+    book.close()
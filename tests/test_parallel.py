@@ -0,0 +1,20 @@
+# Root-parallel search: what a worker's share leaves in the worker's table
+from engine import parallel
+from engine.bitboard import BitBoard
+from engine.candidates import candidate_tracker
+from engine.symmetry import canonical_key
+
+
+def test_share_does_not_store_a_root_score():
+    board = BitBoard()
+    board.place(board.index(5, 5), 0)
+    moves = candidate_tracker(board.copy()).ranked(1)[:3]  # Only part of the root moves
+    try:
+        parallel.init_worker(4)
+        parallel.search_share(board.size, board.win_length, list(board.stones), list(board.history), 1, moves, 2, None, 2)
+        table = parallel.worker_table(board.size, board.win_length)
+        assert table.stores > 0
+        assert table.probe(canonical_key(board, 1)[0]) is None
+    finally:
+        parallel.worker_tables.clear()
+        parallel.init_worker(0)
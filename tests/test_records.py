@@ -0,0 +1,47 @@
+# Saving games to segment files and reading them back
+import os
+
+from engine.bitboard import BitBoard
+from engine.records import DRAW, UNFINISHED, RecordWriter, read_records, replay, result_of
+
+
+def play(size, win_length, cells): # Board after the moves, sides taking turns
+    board = BitBoard(size, win_length)
+    for ply, (row, col) in enumerate(cells):
+        board.place(board.index(row, col), ply % 2)
+    return board
+
+
+def test_round_trip(tmp_path):
+    games = [play(11, 4, [(5, 5), (0, 0), (5, 6), (0, 1), (5, 7), (10, 10), (5, 8)]),  # First player wins
+             play(11, 4, [(3, 3), (4, 4)]),  # Abandoned
+             play(20, 5, [(19, 19), (0, 0), (12, 17)])]  # Cells past 255 need two bytes
+    writer = RecordWriter(str(tmp_path))
+    for board in games:
+        writer.append(board)
+    writer.close()
+    records = list(read_records([str(tmp_path)]))
+    assert [(record.size, record.win_length, record.result) for record in records] == [(11, 4, 0), (11, 4, UNFINISHED), (20, 5, UNFINISHED)]
+    for record, board in zip(records, games):
+        replayed = list(replay(record))[-1][0]
+        assert replayed.history == board.history and replayed.stones == board.stones
+        assert result_of(replayed) == record.result
+
+
+def test_new_segment_when_full_and_cut_off_record(tmp_path):
+    writer = RecordWriter(str(tmp_path), segment_bytes=16)
+    for _ in range(3):
+        writer.append(play(11, 4, [(1, 1), (2, 2), (3, 3)]))
+    writer.close()
+    paths = sorted(os.listdir(tmp_path))
+    assert len(paths) == 3
+    with open(os.path.join(tmp_path, paths[-1]), 'ab') as segment:
+        segment.write(bytes([11, 4, 0, 9, 0, 1]))  # Header promising nine moves, only one written
+    assert len(list(read_records([str(tmp_path)]))) == 3
+
+
+def test_result_of_full_board():
+    board = BitBoard(3, 3)
+    for ply, cell in enumerate((0, 1, 2, 4, 3, 5, 7, 6, 8)):  # x o x / x o o / o x x, no line for either side
+        board.place(board.index(*divmod(cell, 3)), ply % 2)
+    assert board.winner() is None and result_of(board) == DRAW
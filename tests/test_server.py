@@ -0,0 +1,82 @@
+# The match server: its protocol, and AI searches that stay within their own rule set
+import asyncio
+import importlib.util
+import json
+import os
+
+from engine import parallel
+from engine.bitboard import BitBoard
+from engine.book import search_position
+from engine.rules import Rules
+
+SERVER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Network Game', 'server.py')
+spec = importlib.util.spec_from_file_location('server', SERVER_PATH)
+server = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(server)
+
+HISTORY = [3, 14, 35, 49, 33]  # On a 7x7 board, a shared table made the lines-of-3 search miss its loss
+
+
+def position(size, win_length):
+    board = BitBoard(size, win_length)
+    for ply, index in enumerate(HISTORY):
+        board.place(index, ply % 2)
+    return board
+
+
+def search(win_length): # search_position() as a pool worker runs it
+    board = position(7, win_length)
+    return search_position(7, win_length, list(board.history), list(board.stones), len(HISTORY) % 2, None, 4)
+
+
+def test_rule_sets_do_not_share_a_table():
+    try:
+        parallel.init_worker(4)
+        fresh = search(3)
+        parallel.worker_tables.clear()
+        search(4)  # Same stones and the same keys, but lines of 4
+        assert search(3) == fresh
+        assert parallel.worker_table(7, 3) is not parallel.worker_table(7, 4)
+    finally:
+        parallel.worker_tables.clear()
+        parallel.init_worker(0)
+
+
+async def play(port, win_length): # Join an AI match and take the first empty cell every turn, returns the messages received
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(json.dumps({'type': 'join', 'mode': 'ai', 'size': 7, 'win_length': win_length}).encode() + b'\n')
+    board = BitBoard(7, win_length)
+    messages = []
+    while True:
+        message = json.loads(await reader.readline())
+        messages.append(message)
+        if message['type'] == 'moved':
+            board.place(board.index(message['row'], message['col']), message['side'])
+        if message['type'] == 'over':
+            break
+        if message['type'] == 'start' or message['type'] == 'moved' and message['side'] == 1:
+            row, col = board.cell(next(iter(board.legal_moves())))
+            writer.write(json.dumps({'type': 'move', 'row': row, 'col': col}).encode() + b'\n')
+    writer.close()
+    return board, messages
+
+
+def test_two_rule_sets_on_one_size():
+    game = server.GameServer(Rules(7, 4), ai_ms=None, ai_depth=2, ai_workers=1)
+
+    async def run():
+        listener = await asyncio.start_server(game.handle, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            return await asyncio.wait_for(asyncio.gather(play(port, 3), play(port, 4)), 60)
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        game.close()
+    for win_length, (board, messages) in zip((3, 4), results):
+        start, over = messages[0], messages[-1]
+        assert start == {'type': 'start', 'match': start['match'], 'side': 0, 'size': 7, 'win_length': win_length}
+        assert not any(message['type'] == 'error' for message in messages)
+        assert over['reason'] == 'line' and over['winner'] == board.winner()  # The winner by this match's own rules
+    assert game.finished == 2
@@ -0,0 +1,35 @@
+# The threat-space solver only reports wins the full-width search can prove
+from engine.bitboard import BitBoard
+from engine.search import WIN_SCORE, Searcher
+from engine.threats import ThreatSolver
+from engine.tt import TranspositionTable
+
+PROOF_PLIES = 7  # Deepest claimed win checked against the full-width search
+
+# (moves on a 9x9 board with lines of 4, move and plies the solver used to claim as a forced win)
+FALSE_WINS = [
+    ([58, 3, 72, 84, 1, 55], 73, 7),  # Double four whose gaps the defender was never tried on
+    ([48, 8, 21, 41, 24], 23, 7),
+    ([46, 8, 33, 87, 54, 38], 28, 7),  # A forced reply joins a defender stone placed off the VCF
+    ([40, 64, 76, 80, 65], 54, 7),  # Actually a lost position
+    ([32, 24, 63, 22, 46, 43], 23, 7),
+    ([42, 46, 62, 63, 54], 52, 7),
+    ([36, 66, 63, 34, 44], 45, 7),
+]
+
+
+def position(history):
+    board = BitBoard(9, 4)
+    for ply, index in enumerate(history):
+        board.place(index, ply % 2)
+    return board, len(history) % 2
+
+
+def test_no_false_wins():
+    for history, move, plies in FALSE_WINS:
+        board, side = position(history)
+        found = ThreatSolver(board, max_nodes=10 ** 5, time_limit_ms=None).solve(side)
+        assert found != (move, plies), history
+        if found is not None and found[1] <= PROOF_PLIES:
+            searcher = Searcher(board.copy(), found[1], None, TranspositionTable(16), distance=2, threats=False)
+            assert searcher.search(side)[1] >= WIN_SCORE - found[1], history
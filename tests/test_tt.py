@@ -0,0 +1,62 @@
+# Replacement in the two-slot transposition table buckets
+from engine.tt import EXACT, TranspositionTable
+
+
+def bucket(table, key): # The two slots of the bucket `key` falls in
+    slot = (key % table.buckets) * 2
+    return table.slots[slot:slot + 2]
+
+
+def keys_in_one_bucket(table, count):
+    return [1 + table.buckets * i for i in range(count)]
+
+
+def test_deeper_entry_takes_the_first_slot_and_demotes_the_old_one():
+    table = TranspositionTable(1)
+    table.new_search()
+    a, b = keys_in_one_bucket(table, 2)
+    table.store(a, 3, 10, EXACT, 7)
+    table.store(b, 5, 20, EXACT, 8)
+    assert [entry[0] for entry in bucket(table, a)] == [b, a]
+    assert table.probe(a)[2] == 10 and table.probe(b)[2] == 20
+
+
+def test_shallower_entry_goes_to_the_second_slot():
+    table = TranspositionTable(1)
+    table.new_search()
+    a, b, c = keys_in_one_bucket(table, 3)
+    table.store(a, 5, 10, EXACT, None)
+    table.store(b, 2, 20, EXACT, None)
+    table.store(c, 1, 30, EXACT, None)  # Always-replace slot: b goes
+    assert [entry[0] for entry in bucket(table, a)] == [a, c]
+    assert table.probe(b) is None
+
+
+def test_shallow_store_keeps_a_deeper_entry_of_the_same_search():
+    table = TranspositionTable(1)
+    table.new_search()
+    table.store(1, 6, 10, EXACT, 4)
+    table.store(1, 0, 99, EXACT, None)
+    assert table.probe(1)[1:] == (6, 10, EXACT, 4, table.generation)
+
+
+def test_entries_of_earlier_searches_give_way():
+    table = TranspositionTable(1)
+    a, b = keys_in_one_bucket(table, 2)
+    table.new_search()
+    table.store(a, 8, 10, EXACT, None)
+    table.new_search()
+    table.store(b, 1, 20, EXACT, None)  # Shallower, but the deep entry is stale
+    assert [entry[0] for entry in bucket(table, a)] == [b, a]
+    table.store(a, 0, 30, EXACT, None)  # Same key from an earlier search may be replaced too
+    assert table.probe(a)[1:3] == (0, 30)
+
+
+def test_one_copy_per_key():
+    table = TranspositionTable(1)
+    table.new_search()
+    a, b = keys_in_one_bucket(table, 2)
+    table.store(a, 5, 10, EXACT, None)
+    table.store(b, 2, 20, EXACT, None)
+    table.store(b, 6, 21, EXACT, None)  # Moves up to the first slot, a is demoted over the old copy of b
+    assert [entry[0] for entry in bucket(table, a)] == [b, a]